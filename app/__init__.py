@@ -5,23 +5,41 @@ from .routes import api
 from . import models
 from .utils import setup_cloudinary
 from .seed import seed_packages
+from .commands import register_commands
+from . import auth, business_days
+from .uploads import proof_uploads
+from .images import image_processor
+from .mailer import mail_dispatcher
+from .replicas import replica_router, RECENT_WRITES_HEADER
+from .instrumentation import request_metrics
+from .profiling import request_profiler
+from .serializers import JSONProvider
 import os
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = JSONProvider(app)
+    auth.init_app(app)
 
     db.init_app(app)
+    replica_router.init_app(app)
+    request_metrics.init_app(app)
+    request_profiler.init_app(app)
     migrate.init_app(app, db)
     
     # === THIS IS THE CORRECTED LINE ===
     FRONTEND_URL = os.environ.get('FRONTEND_URL') or "http://localhost:5173"
-    cors.init_app(app, resources={r"/api/*": {"origins": FRONTEND_URL}})
+    cors.init_app(app, resources={r"/api/*": {"origins": FRONTEND_URL, "expose_headers": [RECENT_WRITES_HEADER]}})
     # ==================================
 
     mail.init_app(app)
+    mail_dispatcher.init_app(app)
+    business_days.init_app(app)
 
     setup_cloudinary()
+    image_processor.init_app(app)
+    proof_uploads.init_app(app)
 
     app.register_blueprint(api, url_prefix='/api')
 
@@ -30,4 +48,6 @@ def create_app(config_class=Config):
         """Seeds the database with initial data."""
         seed_packages()
 
+    register_commands(app)
+
     return app
\ No newline at end of file
@@ -0,0 +1,117 @@
+import functools
+import hashlib
+import hmac
+import json
+import time
+from urllib.parse import parse_qsl
+from flask import current_app, g, request
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+
+class AuthError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+def init_app(app):
+    """Refuses to start with settings that would break or bypass authentication."""
+    if not app.config.get('SECRET_KEY'):
+        raise RuntimeError("SECRET_KEY must be set; it signs session tokens.")
+    if app.config['AUTH_REQUIRED'] and not app.config['TELEGRAM_BOT_TOKEN']:
+        raise RuntimeError(
+            "AUTH_REQUIRED needs TELEGRAM_BOT_TOKEN; without it /auth trusts the posted "
+            "user data and anyone could obtain an admin token."
+        )
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='auth-token')
+
+def issue_token(user_id, is_admin):
+    """Signs a compact session token carrying the user's id and admin flag."""
+    return _serializer().dumps({"uid": user_id, "adm": bool(is_admin)})
+
+def load_token(token):
+    """Returns the token's payload, or None if it is forged or expired. Needs no database access."""
+    try:
+        return _serializer().loads(token, max_age=current_app.config['AUTH_TOKEN_MAX_AGE'])
+    except BadSignature:
+        return None
+
+def validate_init_data(init_data, bot_token, max_age):
+    """
+    Checks Telegram Mini App initData against the bot token as described in
+    https://core.telegram.org/bots/webapps#validating-data-received-via-the-mini-app
+    and returns its fields (with `user` decoded), or None if the signature is
+    wrong or auth_date is older than max_age seconds.
+    """
+    fields = dict(parse_qsl(init_data or '', keep_blank_values=True))
+    received_hash = fields.pop('hash', None)
+    if not received_hash:
+        return None
+    data_check_string = '\n'.join(f"{key}={value}" for key, value in sorted(fields.items()))
+    secret_key = hmac.new(b'WebAppData', bot_token.encode(), hashlib.sha256).digest()
+    expected_hash = hmac.new(secret_key, data_check_string.encode(), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected_hash, received_hash):
+        return None
+    try:
+        if time.time() - int(fields.get('auth_date', 0)) > max_age:
+            return None
+        fields['user'] = json.loads(fields.get('user', 'null'))
+    except ValueError:
+        return None
+    return fields
+
+def get_identity():
+    """
+    Returns the verified token payload for this request, or None if no token
+    was sent and AUTH_REQUIRED is off (clients that predate tokens).
+    Raises AuthError for a bad or missing token.
+    """
+    if 'auth_identity' not in g:
+        header = request.headers.get('Authorization', '')
+        identity = None
+        if header.startswith('Bearer '):
+            identity = load_token(header[len('Bearer '):])
+            if identity is None:
+                raise AuthError("Invalid or expired session token", 401)
+        elif current_app.config['AUTH_REQUIRED']:
+            raise AuthError("Authentication required", 401)
+        g.auth_identity = identity
+    return g.auth_identity
+
+def check_user_access(user_id):
+    """Raises AuthError unless the caller is user_id or an admin."""
+    identity = get_identity()
+    if identity is not None and not identity['adm'] and str(identity['uid']) != str(user_id):
+        raise AuthError("You do not have access to this user's data", 403)
+
+def user_required(view):
+    """For views with a `user_id` argument: only that user (or an admin) may call them."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        check_user_access(kwargs['user_id'])
+        return view(*args, **kwargs)
+    return wrapper
+
+def admin_required(view):
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        identity = get_identity()
+        if identity is not None and not identity['adm']:
+            raise AuthError("Admin access required", 403)
+        return view(*args, **kwargs)
+    return wrapper
+
+def verified_admin_required(view):
+    """
+    Like admin_required, but also refuses requests without a token while
+    AUTH_REQUIRED is off. For admin endpoints no tokenless client ever used.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        identity = get_identity()
+        if identity is None:
+            raise AuthError("Authentication required", 401)
+        if not identity['adm']:
+            raise AuthError("Admin access required", 403)
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,286 @@
+import contextvars
+import json
+import os
+import random
+import subprocess
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, insert, delete
+from sqlalchemy.engine import Engine
+from .extensions import db
+from .models import User, Package, UserPackage, WithdrawalRequest
+from .auth import issue_token
+from .referrals import commission_totals, REFERRAL_COMMISSION_RATE
+
+# Telegram ids of generated users start here so they never clash with real ones
+SYNTHETIC_TELEGRAM_ID_BASE = 9_000_000_000_000
+# Share of generated packages in each status
+STATUS_WEIGHTS = {
+    'pending': 0.25,
+    'proof_processing': 0.02,
+    'paid': 0.35,
+    'rejected': 0.08,
+    'expired': 0.15,  # withdrawal requested and awaiting an admin
+    'withdrawn': 0.15,
+}
+INSERT_BATCH_SIZE = 1000
+
+def _insert_batched(model, rows):
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        db.session.execute(insert(model), rows[start:start + INSERT_BATCH_SIZE])
+
+def generate_data(users, packages, seed=0, referral_rate=0.6, now=None):
+    """
+    Bulk-inserts `users` synthetic users, each referred by an earlier one with
+    probability referral_rate, and `packages` UserPackages spread over all
+    statuses. Every 'expired' package gets the pending withdrawal request that
+    put it there. The same seed produces the same data.
+
+    Returns counts of the inserted rows.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    catalog = Package.query.order_by(Package.id).all()
+    if not catalog:
+        raise RuntimeError("No packages found; run `flask db-seed` first.")
+
+    first_id = (db.session.query(func.max(User.id)).scalar() or 0) + 1
+    telegram_base = SYNTHETIC_TELEGRAM_ID_BASE + first_id
+    user_rows = []
+    for i in range(users):
+        user_id = first_id + i
+        referrer = rng.randrange(first_id, user_id) if i and rng.random() < referral_rate else None
+        user_rows.append({
+            'id': user_id,
+            'telegram_id': telegram_base + i,
+            'first_name': f'Bench {user_id}',
+            'username': f'bench_{user_id}',
+            'is_admin': False,
+            'referral_code': f'b{user_id:09x}',
+            'referred_by_id': referrer,
+        })
+    _insert_batched(User, user_rows)
+
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+    first_package_id = (db.session.query(func.max(UserPackage.id)).scalar() or 0) + 1
+    package_rows, withdrawal_rows = [], []
+    for i in range(packages):
+        package = rng.choice(catalog)
+        status = rng.choices(statuses, weights)[0]
+        amount = round(rng.uniform(package.min_price, package.max_price or package.min_price * 10), -2)
+        purchased = now - timedelta(days=rng.uniform(0, 120))
+        row = {
+            'id': first_package_id + i,
+            'user_id': first_id + rng.randrange(users),
+            'package_id': package.id,
+            'investment_amount': amount,
+            'status': status,
+            'purchase_date': purchased,
+            'activation_date': None,
+            'first_activation_date': None,
+            'expiry_date': None,
+            'rejection_reason': 'Payment not received' if status == 'rejected' else None,
+            'total_withdrawn': 0.0,
+            'is_matured': False,
+            'updated_at': purchased,
+            'payment_method': rng.choice(['crypto', 'bank_transfer']),
+            'payment_proof_url': None,
+        }
+        if status in ('pending', 'rejected'):
+            row['payment_proof_url'] = f'https://example.invalid/proofs/{first_package_id + i}.webp'
+        if status in ('paid', 'expired', 'withdrawn'):
+            row['activation_date'] = row['first_activation_date'] = purchased + timedelta(hours=rng.uniform(1, 48))
+            row['expiry_date'] = row['activation_date'] + timedelta(days=package.duration_days * 7 / 5)
+            row['is_matured'] = status == 'paid' and row['expiry_date'] <= now
+        if status == 'withdrawn':
+            row['total_withdrawn'] = amount
+        if status == 'expired':
+            withdrawal_rows.append({
+                'user_id': row['user_id'],
+                'user_package_id': row['id'],
+                'amount': round(amount * package.dividend_percentage / 100, 2),
+                'status': 'pending',
+                'request_date': row['expiry_date'],
+                'withdrawal_method': 'crypto',
+                'wallet_address': f'T{row["id"]:033d}',
+                'crypto_network': 'TRC20',
+            })
+        package_rows.append(row)
+    _insert_batched(UserPackage, package_rows)
+    _insert_batched(WithdrawalRequest, withdrawal_rows)
+    db.session.commit()
+    return {'users': len(user_rows), 'packages': len(package_rows), 'withdrawals': len(withdrawal_rows)}
+
+def _referral_commission_loop(referrer):
+    """The per-referral query loop /user/<id>/referrals ran before commission_totals()."""
+    commission = 0
+    for referral in referrer.referrals.all():
+        first_paid_package = UserPackage.query.filter_by(user_id=referral.id, status='paid')\
+            .order_by(UserPackage.activation_date.asc()).first()
+        if first_paid_package:
+            commission += first_paid_package.investment_amount * REFERRAL_COMMISSION_RATE
+    return commission
+
+def compare_referral_commission(referral_count, repeat=3, seed=0):
+    """
+    Times the old per-referral loop against the windowed commission_totals()
+    query for one referrer with `referral_count` referrals, each holding one or
+    two paid packages. The rows are deleted again afterwards.
+
+    Returns the best-of-`repeat` timings in milliseconds and both totals.
+    """
+    rng = random.Random(seed)
+    package = Package.query.first()
+    if package is None:
+        raise RuntimeError("No packages found; run `flask db-seed` first.")
+    now = datetime.utcnow()
+    referrer_id = (db.session.query(func.max(User.id)).scalar() or 0) + 1
+    telegram_base = SYNTHETIC_TELEGRAM_ID_BASE + referrer_id
+    users = [{'id': referrer_id + i, 'telegram_id': telegram_base + i, 'first_name': f'Bench {referrer_id + i}',
+              'is_admin': False, 'referral_code': f'b{referrer_id + i:09x}',
+              'referred_by_id': referrer_id if i else None} for i in range(referral_count + 1)]
+    packages = []
+    for user in users[1:]:
+        for n in range(rng.randint(1, 2)):
+            purchased = now - timedelta(days=60 - n)
+            packages.append({'user_id': user['id'], 'package_id': package.id, 'investment_amount': rng.choice([20000, 50000, 100000]),
+                             'status': 'paid', 'purchase_date': purchased, 'activation_date': purchased + timedelta(hours=1),
+                             'first_activation_date': purchased + timedelta(hours=1),
+                             'expiry_date': purchased + timedelta(days=25), 'total_withdrawn': 0.0, 'is_matured': False,
+                             'updated_at': purchased})
+    try:
+        _insert_batched(User, users)
+        _insert_batched(UserPackage, packages)
+        db.session.commit()
+
+        timings = {}
+        for name, compute in (('loop', lambda: _referral_commission_loop(db.session.get(User, referrer_id))),
+                              ('windowed', lambda: commission_totals([referrer_id]).get(referrer_id, 0.0))):
+            best = None
+            for _ in range(repeat):
+                db.session.expire_all()
+                started = time.perf_counter()
+                total = compute()
+                elapsed = (time.perf_counter() - started) * 1000
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = {'ms': best, 'commission': total}
+        return timings
+    finally:
+        db.session.rollback()
+        user_ids = [user['id'] for user in users]
+        for start in range(0, len(user_ids), INSERT_BATCH_SIZE):
+            batch = user_ids[start:start + INSERT_BATCH_SIZE]
+            db.session.execute(delete(UserPackage).where(UserPackage.user_id.in_(batch)))
+        # Referrals point at the referrer, so remove them before it.
+        for start in range(len(user_ids), 0, -INSERT_BATCH_SIZE):
+            db.session.execute(delete(User).where(User.id.in_(user_ids[max(0, start - INSERT_BATCH_SIZE):start])))
+        db.session.commit()
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def benchmark_routes(user_ids, telegram_ids, admin_token, user_tokens):
+    """(name, method, path, json body, token) generators for each benchmarked route."""
+    def user_route(path):
+        def make(rng):
+            user_id = rng.choice(user_ids)
+            return 'get', path.format(user_id=user_id), None, user_tokens(user_id)
+        return make
+
+    def admin_route(path):
+        return lambda rng: ('get', path, None, admin_token)
+
+    return {
+        'auth': lambda rng: ('post', '/api/auth', {'user': {'id': rng.choice(telegram_ids), 'first_name': 'Bench'}}, None),
+        'packages': lambda rng: ('get', '/api/packages', None, None),
+        'dashboard': user_route('/api/user/{user_id}/dashboard'),
+        'history': user_route('/api/user/{user_id}/history'),
+        'summary': user_route('/api/user/{user_id}/summary'),
+        'referrals': user_route('/api/user/{user_id}/referrals'),
+        'admin_pending': admin_route('/api/admin/pending'),
+        'admin_withdrawals': admin_route('/api/admin/withdrawals'),
+        'admin_history': admin_route('/api/admin/history'),
+    }
+
+def run_benchmark(app, iterations=200, seed=0, routes=None):
+    """
+    Drives each route `iterations` times through the Flask test client, in
+    process, against the configured database. Returns per-route p50/p99
+    latency in milliseconds and mean SQL statements per request.
+    """
+    rng = random.Random(seed)
+    with app.app_context():
+        sample = db.session.query(User.id, User.telegram_id).order_by(User.id.desc()).limit(1000).all()
+        if not sample:
+            raise RuntimeError("No users found; run `flask bench-seed` first.")
+        user_ids = [row.id for row in sample]
+        telegram_ids = [row.telegram_id for row in sample]
+        admin_token = issue_token(0, True)
+        tokens = {user_id: issue_token(user_id, False) for user_id in user_ids}
+
+    statements = [0]
+    def count_statement(*args):
+        statements[0] += 1
+
+    def timed_request(client, method, path, body, token):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        statements[0] = 0
+        started = time.perf_counter()
+        response = getattr(client, method)(path, json=body, headers=headers)
+        return (time.perf_counter() - started) * 1000, statements[0], response.status_code
+
+    client = app.test_client()
+    results = {}
+    event.listen(Engine, 'before_cursor_execute', count_statement)
+    try:
+        for name, make_request in benchmark_routes(user_ids, telegram_ids, admin_token, tokens.get).items():
+            if routes and name not in routes:
+                continue
+            latencies, queries, errors = [], [], 0
+            for _ in range(iterations):
+                # An empty context keeps requests from sharing the CLI's app context,
+                # so each gets its own `g` and database session as in production.
+                elapsed, statement_count, status = contextvars.Context().run(timed_request, client, *make_request(rng))
+                latencies.append(elapsed)
+                queries.append(statement_count)
+                errors += status >= 400
+            latencies.sort()
+            results[name] = {
+                'p50_ms': round(percentile(latencies, 50), 3),
+                'p99_ms': round(percentile(latencies, 99), 3),
+                'queries_per_request': round(sum(queries) / len(queries), 2),
+                'errors': errors,
+            }
+    finally:
+        event.remove(Engine, 'before_cursor_execute', count_statement)
+    return results
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def save_results(results, output_dir, dialect, iterations):
+    """Writes results to <output_dir>/<commit>-<dialect>.json and returns the path."""
+    commit = current_commit()
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f'{commit}-{dialect}.json')
+    with open(path, 'w') as f:
+        json.dump({
+            'commit': commit,
+            'dialect': dialect,
+            'iterations': iterations,
+            'recorded_at': datetime.utcnow().isoformat(),
+            'routes': results,
+        }, f, indent=2, sort_keys=True)
+    return path
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,89 @@
+import bisect
+from datetime import date, timedelta
+from flask import current_app, has_app_context
+
+# Fixed-date Nigerian public holidays as (month, day). Movable feasts (Easter,
+# the Eids, Mawlid) change every year and must be listed as explicit dates.
+NIGERIAN_FIXED_HOLIDAYS = ((1, 1), (5, 1), (6, 12), (10, 1), (12, 25), (12, 26))
+
+def fixed_holidays(years, month_days=NIGERIAN_FIXED_HOLIDAYS):
+    """Expands (month, day) pairs into concrete dates for each of the given years."""
+    return [date(year, month, day) for year in years for month, day in month_days]
+
+def _weekday(ordinal):
+    # date.fromordinal(1) is a Monday
+    return (ordinal - 1) % 7
+
+def _weekend_offset(weekday, days):
+    """Calendar days from a day with the given weekday to `days` Mon-Fri days later."""
+    back = 0
+    if weekday > 4:
+        # Counting from a Saturday or Sunday is the same as counting from the
+        # Friday before it, less the days between.
+        back = weekday - 4
+        weekday = 4
+    weeks, remainder = divmod(days, 5)
+    offset = weeks * 7 + remainder
+    if weekday + remainder > 4:
+        offset += 2
+    return offset - back
+
+class BusinessCalendar:
+    """
+    Adds working days (Mon-Fri, less any holidays) to a date in constant time
+    for the weekend arithmetic plus a bisect over the sorted holiday list.
+    """
+
+    def __init__(self, holidays=()):
+        # Holidays on a weekend are skipped anyway, so only weekdays matter.
+        self._holidays = sorted({d.toordinal() for d in holidays if d.weekday() < 5})
+
+    def _holidays_between(self, after, through):
+        """Number of holidays with ordinal in (after, through]."""
+        return bisect.bisect_right(self._holidays, through) - bisect.bisect_right(self._holidays, after)
+
+    def _end_ordinal(self, start_ordinal, days):
+        end = start_ordinal + _weekend_offset(_weekday(start_ordinal), days)
+        # Each holiday crossed pushes the end out by another working day, which
+        # may cross further holidays in turn.
+        extra = self._holidays_between(start_ordinal, end)
+        while extra:
+            previous_end = end
+            end += _weekend_offset(_weekday(end), extra)
+            extra = self._holidays_between(previous_end, end)
+        return end
+
+    def add_business_days(self, start, days):
+        """
+        Returns start moved forward by `days` working days, keeping its time of
+        day. Matches stepping one day at a time and counting only working days.
+        """
+        if days <= 0:
+            return start
+        start_ordinal = start.toordinal()
+        return start + timedelta(days=self._end_ordinal(start_ordinal, days) - start_ordinal)
+
+    def add_business_days_many(self, starts, days):
+        """
+        Batch form of add_business_days. `days` is either one count applied to
+        every start or a sequence of counts matching `starts`.
+        """
+        if isinstance(days, int):
+            return [self.add_business_days(start, days) for start in starts]
+        return [self.add_business_days(start, n) for start, n in zip(starts, days)]
+
+def init_app(app):
+    holidays = [date.fromisoformat(d) for d in app.config.get('BUSINESS_HOLIDAYS', [])]
+    holidays += fixed_holidays(app.config.get('BUSINESS_HOLIDAY_YEARS', []))
+    app.extensions['business_calendar'] = BusinessCalendar(holidays)
+
+def get_calendar():
+    if has_app_context() and 'business_calendar' in current_app.extensions:
+        return current_app.extensions['business_calendar']
+    return _default_calendar
+
+_default_calendar = BusinessCalendar()
+
+def calculate_expiry_date(start_date, working_days):
+    """Calculates the expiry date by adding only working days (Mon-Fri, excluding holidays)."""
+    return get_calendar().add_business_days(start_date, working_days)
@@ -0,0 +1,108 @@
+import hashlib
+import threading
+import time
+from collections import namedtuple, OrderedDict
+from flask import current_app
+from .models import Package
+from .replicas import primary
+
+PackageBounds = namedtuple('PackageBounds', ['id', 'name', 'min_price', 'max_price'])
+CatalogSnapshot = namedtuple('CatalogSnapshot', ['payload', 'etag', 'bounds', 'expires_at'])
+
+class CatalogCache:
+    """
+    Per-process cache of the package catalog. Holds the serialized
+    GET /packages body and each package's price bounds for purchase checks.
+
+    Entries expire after CATALOG_CACHE_TTL seconds and are dropped immediately
+    when this process creates or updates a package; other worker processes
+    pick up the change when their copy expires. The catalog is always loaded
+    from the primary: a lagging replica would be cached for the whole TTL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Swapped as a whole and read once per call, so readers on the
+        # lock-free path never see a half-updated or invalidated catalog.
+        self._current = None
+
+    def _snapshot(self):
+        snapshot = self._current
+        if snapshot is not None and time.monotonic() < snapshot.expires_at:
+            return snapshot
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock.
+            snapshot = self._current
+            if snapshot is None or time.monotonic() >= snapshot.expires_at:
+                with primary():
+                    packages = Package.query.order_by(Package.id).all()
+                payload = current_app.json.dumps([p.to_dict() for p in packages]).encode()
+                snapshot = CatalogSnapshot(
+                    payload,
+                    hashlib.sha1(payload).hexdigest(),
+                    {p.id: PackageBounds(p.id, p.name, p.min_price, p.max_price) for p in packages},
+                    time.monotonic() + current_app.config['CATALOG_CACHE_TTL'],
+                )
+                self._current = snapshot
+            return snapshot
+
+    def get_snapshot(self):
+        """Returns the current CatalogSnapshot; its payload and etag always belong together."""
+        return self._snapshot()
+
+    def get_etag(self):
+        """Returns a strong ETag for the current payload."""
+        return self._snapshot().etag
+
+    def get_package(self, package_id):
+        """Returns the PackageBounds for package_id, or None if it doesn't exist."""
+        bounds = self._snapshot().bounds.get(package_id)
+        if bounds is None:
+            # Could have been created in another process since our last refresh.
+            with primary():
+                package = Package.query.get(package_id)
+            if package is not None:
+                bounds = PackageBounds(package.id, package.name, package.min_price, package.max_price)
+        return bounds
+
+    def invalidate(self):
+        with self._lock:
+            self._current = None
+
+package_catalog = CatalogCache()
+
+class UserCache:
+    """
+    Bounded LRU of serialized users keyed by telegram_id, so repeat /auth calls
+    skip the user lookup. Entries expire after USER_CACHE_TTL seconds so
+    changes made directly in the database (e.g. granting admin) show up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # telegram_id -> (user_data, expires_at)
+
+    def get(self, telegram_id):
+        with self._lock:
+            entry = self._entries.get(telegram_id)
+            if entry is None:
+                return None
+            if time.monotonic() >= entry[1]:
+                del self._entries[telegram_id]
+                return None
+            self._entries.move_to_end(telegram_id)
+            return dict(entry[0])
+
+    def put(self, telegram_id, user_data):
+        config = current_app.config
+        with self._lock:
+            self._entries[telegram_id] = (dict(user_data), time.monotonic() + config['USER_CACHE_TTL'])
+            self._entries.move_to_end(telegram_id)
+            while len(self._entries) > config['USER_CACHE_SIZE']:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+user_cache = UserCache()
@@ -0,0 +1,177 @@
+from datetime import timedelta
+import socket
+import click
+from .extensions import db
+from .models import User
+from .referrals import commission_totals
+from .maturity import sweep_matured_packages
+from .utils import send_email
+from .extensions import mail
+from .mailer import measure_mail_throughput
+from .db_pool import pool_stats, measure_pool_throughput
+from .profiling import request_profiler, PROFILE_HEADER
+from .uploads import proof_uploads
+from .benchmark import generate_data, run_benchmark, save_results, load_results, compare_referral_commission
+
+def register_commands(app):
+    @app.cli.command("rebuild-commissions")
+    @click.option('--batch-size', default=500, show_default=True, help="Users per batch.")
+    @click.option('--verify', is_flag=True, help="Report mismatches without writing.")
+    def rebuild_commissions(batch_size, verify):
+        """Rebuilds User.commission_earned from UserPackage history."""
+        last_id = 0
+        checked = mismatched = 0
+        while True:
+            batch = db.session.query(User.id, User.commission_earned)\
+                .filter(User.id > last_id).order_by(User.id).limit(batch_size).all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            totals = commission_totals([user_id for user_id, _ in batch])
+            for user_id, current in batch:
+                expected = totals.get(user_id, 0.0)
+                checked += 1
+                if abs(current - expected) > 1e-6:
+                    mismatched += 1
+                    print(f'User {user_id}: ledger {current:,.2f}, history {expected:,.2f}')
+                    if not verify:
+                        db.session.query(User).filter_by(id=user_id)\
+                            .update({User.commission_earned: expected}, synchronize_session=False)
+            if not verify:
+                db.session.commit()
+
+        action = "found" if verify else "corrected"
+        print(f'Checked {checked} users, {action} {mismatched} mismatched ledgers.')
+
+    @app.cli.command("sweep-matured")
+    @click.option('--batch-size', default=1000, show_default=True, help="Packages per UPDATE.")
+    @click.option('--notify', is_flag=True, help="Email a summary to ADMIN_EMAIL.")
+    def sweep_matured(batch_size, notify):
+        """Flags paid packages past their expiry date as matured. Run from cron."""
+        matured = sweep_matured_packages(batch_size)
+        print(f'Flagged {matured} matured packages.')
+        if notify and matured and app.config.get('ADMIN_EMAIL'):
+            send_email(app.config['ADMIN_EMAIL'], "Packages matured",
+                       f"<p>{matured} packages have matured and are ready for withdrawal.</p>")
+
+    @app.cli.command("recover-proofs")
+    @click.option('--older-than', default=10, show_default=True, help="Minutes a package must have sat in proof_processing.")
+    def recover_proofs(older_than):
+        """Requeues or resets payment proofs stuck in proof_processing. Run after a restart."""
+        requeued, reset = proof_uploads.recover(timedelta(minutes=older_than))
+        print(f'Requeued {requeued} spooled proofs, reset {reset} packages to pending.')
+
+    @app.cli.command("db-pool-stats")
+    def db_pool_stats():
+        """Prints the connection pool settings and counters for this process."""
+        print(f"Driver: {db.engine.url.drivername}")
+        print(f"Options: {app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or 'defaults'}")
+        print(f"Pool: {pool_stats(db.engine)}")
+
+    @app.cli.command("db-pool-bench")
+    @click.option('--sizes', default='5,10,20', show_default=True, help="Comma-separated pool sizes to try.")
+    @click.option('--threads', default=32, show_default=True, help="Concurrent client threads.")
+    @click.option('--duration', default=5.0, show_default=True, help="Seconds per pool size.")
+    @click.option('--statement', default='SELECT 1', show_default=True, help="SQL each thread runs.")
+    @click.option('--max-overflow', default=0, show_default=True, help="Extra connections allowed beyond the pool size.")
+    def db_pool_bench(sizes, threads, duration, statement, max_overflow):
+        """Measures query throughput against the configured database at several pool sizes."""
+        url = db.engine.url
+        if not app.config.get('SQLALCHEMY_ENGINE_OPTIONS'):
+            print("Note: this database uses SQLAlchemy's default pool; pool size and overflow are not applied.")
+        for size in [int(s) for s in sizes.split(',')]:
+            result = measure_pool_throughput(url, app.config.get('SQLALCHEMY_ENGINE_OPTIONS'), size, threads, duration, statement,
+                                             max_overflow)
+            wait = result['mean_checkout_wait_ms']
+            wait = f"{wait:.2f} ms" if wait is not None else "n/a"
+            print(f"pool_size={size:<4} max_overflow={result['max_overflow']:<4} "
+                  f"{result['queries_per_second']:>10,.0f} queries/s   mean checkout wait {wait}")
+
+    @app.cli.command("mail-bench")
+    @click.option('--count', default=500, show_default=True, help="Messages per run.")
+    @click.option('--workers', default='0,1,2,4', show_default=True,
+                  help="Comma-separated worker counts; 0 opens a connection per message.")
+    @click.option('--local', is_flag=True, help="Send to a throwaway local SMTP sink (needs aiosmtpd) instead of MAIL_SERVER.")
+    def mail_bench(count, workers, local):
+        """Measures outgoing mail throughput with and without the dispatcher."""
+        controller = None
+        if local:
+            from aiosmtpd.controller import Controller
+            from aiosmtpd.handlers import Sink
+            with socket.socket() as probe:
+                probe.bind(('127.0.0.1', 0))
+                port = probe.getsockname()[1]
+            controller = Controller(Sink(), hostname='127.0.0.1', port=port)
+            controller.start()
+            app.config.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=port,
+                              MAIL_USE_TLS=False, MAIL_USE_SSL=False, MAIL_USERNAME=None, MAIL_SUPPRESS_SEND=False)
+            mail.init_app(app)
+        try:
+            print(f"{'workers':>8}{'seconds':>10}{'msg/s':>10}")
+            for n in [int(w) for w in workers.split(',')]:
+                result = measure_mail_throughput(app, count, n)
+                print(f"{n:>8}{result['seconds']:>10.2f}{result['messages_per_second']:>10.1f}")
+        finally:
+            if controller is not None:
+                controller.stop()
+
+    @app.cli.command("bench-seed")
+    @click.option('--users', default=10000, show_default=True, help="Users to create.")
+    @click.option('--packages', default=50000, show_default=True, help="UserPackages to create.")
+    @click.option('--seed', default=0, show_default=True, help="Random seed; the same seed gives the same data.")
+    def bench_seed(users, packages, seed):
+        """Bulk-inserts synthetic users, referral trees, packages and withdrawals for benchmarking."""
+        counts = generate_data(users, packages, seed)
+        print(f"Inserted {counts['users']} users, {counts['packages']} packages and {counts['withdrawals']} pending withdrawals.")
+
+    @app.cli.command("bench-run")
+    @click.option('--iterations', default=200, show_default=True, help="Requests per route.")
+    @click.option('--route', 'routes', multiple=True, help="Only benchmark this route (repeatable).")
+    @click.option('--output-dir', default='benchmarks', show_default=True, help="Where results are saved, one file per commit and database.")
+    def bench_run(iterations, routes, output_dir):
+        """Measures p50/p99 latency and queries per request for the main routes."""
+        results = run_benchmark(app, iterations, routes=routes)
+        print(f"{'route':<20}{'p50 ms':>10}{'p99 ms':>10}{'queries':>10}{'errors':>8}")
+        for name, r in results.items():
+            print(f"{name:<20}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['queries_per_request']:>10.1f}{r['errors']:>8}")
+        print(f"Saved to {save_results(results, output_dir, db.engine.dialect.name, iterations)}")
+
+    @app.cli.command("bench-compare")
+    @click.argument('baseline', type=click.Path(exists=True))
+    @click.argument('candidate', type=click.Path(exists=True))
+    def bench_compare(baseline, candidate):
+        """Compares two saved bench-run results route by route."""
+        before, after = load_results(baseline), load_results(candidate)
+        print(f"{before['commit']} -> {after['commit']} ({after['dialect']})")
+        for name, new in after['routes'].items():
+            old = before['routes'].get(name)
+            if old is None:
+                print(f"{name:<20} new")
+                continue
+            change = (new['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0
+            print(f"{name:<20} p50 {old['p50_ms']:>8.2f} -> {new['p50_ms']:>8.2f} ms ({change:+.0f}%)   "
+                  f"p99 {old['p99_ms']:>8.2f} -> {new['p99_ms']:>8.2f} ms   "
+                  f"queries {old['queries_per_request']:.1f} -> {new['queries_per_request']:.1f}")
+
+    @app.cli.command("bench-referrals")
+    @click.option('--sizes', default='10,1000,50000', show_default=True, help="Comma-separated referral counts to try.")
+    @click.option('--repeat', default=3, show_default=True, help="Runs per size; the best is reported.")
+    def bench_referrals(sizes, repeat):
+        """Compares the old per-referral commission loop with the windowed query."""
+        print(f"{'referrals':>10}{'loop ms':>12}{'windowed ms':>14}{'speedup':>10}  commission")
+        for size in [int(s) for s in sizes.split(',')]:
+            result = compare_referral_commission(size, repeat)
+            loop, windowed = result['loop'], result['windowed']
+            match = "match" if abs(loop['commission'] - windowed['commission']) < 1e-6 else "MISMATCH"
+            print(f"{size:>10}{loop['ms']:>12.1f}{windowed['ms']:>14.1f}{loop['ms'] / windowed['ms']:>9.0f}x  "
+                  f"{windowed['commission']:,.2f} ({match})")
+
+    @app.cli.command("profile-token")
+    def profile_token():
+        """Prints a token that makes a request run under cProfile (needs PROFILING_ENABLED)."""
+        if not app.config['PROFILING_ENABLED']:
+            print("Warning: PROFILING_ENABLED is off, so the server will ignore this token.")
+        print(request_profiler.issue_token())
+        print(f"Send it as the {PROFILE_HEADER} header; profiles are saved to {app.config['PROFILE_DIR']}, "
+              f"valid for {app.config['PROFILE_TOKEN_MAX_AGE']}s.")
@@ -1,13 +1,93 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# DB_DRIVER values and the SQLAlchemy dialect each one selects for mysql:// URIs
+MYSQL_DRIVERS = {
+    'pymysql': 'mysql+pymysql',
+    'mysqlconnector': 'mysql+mysqlconnector',
+}
+
+def database_uri(uri, driver=None):
+    """Points a mysql:// URI at the DBAPI driver named by DB_DRIVER, if one is set."""
+    if uri and driver and uri.split('://', 1)[0].startswith('mysql'):
+        uri = f"{MYSQL_DRIVERS[driver]}://{uri.split('://', 1)[1]}"
+    return uri
+
+def engine_options(uri):
+    """Connection pool settings. SQLite uses SQLAlchemy's defaults."""
+    if not uri or uri.startswith('sqlite'):
+        return {}
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE') or 10),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW') or 20),
+        # Recycle before MySQL's wait_timeout (or a proxy's idle cutoff) drops the connection
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE') or 280),
+        'pool_pre_ping': (os.environ.get('DB_POOL_PRE_PING') or 'True') == 'True',
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT') or 30),
+    }
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY')
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URI')
+
+    # Authentication. With TELEGRAM_BOT_TOKEN set, /auth only accepts signed
+    # Mini App initData. With AUTH_REQUIRED on, every other route needs the
+    # session token /auth returns, so it also needs TELEGRAM_BOT_TOKEN.
+    TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN')
+    TELEGRAM_INIT_DATA_MAX_AGE = int(os.environ.get('TELEGRAM_INIT_DATA_MAX_AGE') or 86400)
+    AUTH_REQUIRED = os.environ.get('AUTH_REQUIRED') == 'True'
+    AUTH_TOKEN_MAX_AGE = int(os.environ.get('AUTH_TOKEN_MAX_AGE') or 7 * 86400)
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE') or 10000)
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL') or 300)
+    SQLALCHEMY_DATABASE_URI = database_uri(os.environ.get('DATABASE_URI'), os.environ.get('DB_DRIVER'))
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Read replicas: comma-separated URIs. GET views marked @read_only read from
+    # them while their lag stays under REPLICA_MAX_LAG seconds.
+    SQLALCHEMY_BINDS = {
+        f'replica_{i}': database_uri(uri.strip(), os.environ.get('DB_DRIVER'))
+        for i, uri in enumerate((os.environ.get('REPLICA_DATABASE_URIS') or '').split(',')) if uri.strip()
+    }
+    REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG') or 5)
+    REPLICA_HEALTH_CHECK_INTERVAL = float(os.environ.get('REPLICA_HEALTH_CHECK_INTERVAL') or 10)
+    # Seconds a user's (or the admins') reads stay on the primary after they write
+    READ_YOUR_WRITES_WINDOW = float(os.environ.get('READ_YOUR_WRITES_WINDOW') or 10)
+
+    # Per-endpoint query counts and timings, exposed at /api/metrics and in Server-Timing
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED') == 'True'
+    METRICS_SLOW_QUERY_SECONDS = float(os.environ.get('METRICS_SLOW_QUERY_SECONDS') or 0.5)
+
+    # Per-request cProfile, triggered by a signed X-Profile-Token header (`flask profile-token`)
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED') == 'True'
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'posh-profiles')
+    PROFILE_TOKEN_MAX_AGE = int(os.environ.get('PROFILE_TOKEN_MAX_AGE') or 3600)
+
+    # Seconds a worker may serve its cached package catalog before reloading it
+    CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL') or 300)
+
+    # Comma-separated ISO dates skipped when counting package working days
+    BUSINESS_HOLIDAYS = [d.strip() for d in (os.environ.get('BUSINESS_HOLIDAYS') or '').split(',') if d.strip()]
+    # Comma-separated years whose fixed-date Nigerian public holidays are added to those
+    BUSINESS_HOLIDAY_YEARS = [int(y) for y in (os.environ.get('BUSINESS_HOLIDAY_YEARS') or '').split(',') if y.strip()]
+
+    # Payment proof uploads: 'cloudinary' or 'local' (files served from LOCAL_STORAGE_URL)
+    PROOF_STORAGE_BACKEND = os.environ.get('PROOF_STORAGE_BACKEND') or 'cloudinary'
+    LOCAL_STORAGE_DIR = os.environ.get('LOCAL_STORAGE_DIR') or os.path.join(tempfile.gettempdir(), 'posh-uploads')
+    LOCAL_STORAGE_URL = os.environ.get('LOCAL_STORAGE_URL') or 'http://localhost:5001/uploads'
+    UPLOAD_SPOOL_DIR = os.environ.get('UPLOAD_SPOOL_DIR') or os.path.join(tempfile.gettempdir(), 'posh-upload-spool')
+    UPLOAD_WORKERS = int(os.environ.get('UPLOAD_WORKERS') or 4)
+    UPLOAD_MAX_RETRIES = int(os.environ.get('UPLOAD_MAX_RETRIES') or 3)
+    UPLOAD_RETRY_BACKOFF = float(os.environ.get('UPLOAD_RETRY_BACKOFF') or 1.0)
+
+    # Proof and package images are downscaled and re-encoded before upload
+    IMAGE_MAX_DIMENSION = int(os.environ.get('IMAGE_MAX_DIMENSION') or 1600)
+    IMAGE_FORMAT = os.environ.get('IMAGE_FORMAT') or 'WEBP'
+    IMAGE_QUALITY = int(os.environ.get('IMAGE_QUALITY') or 80)
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS') or 2)
+
     # Mail Configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
@@ -15,4 +95,14 @@ class Config:
     MAIL_USE_SSL = os.environ.get('MAIL_SSL_TLS') == 'True'
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
-    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_FROM')
\ No newline at end of file
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_FROM')
+    ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL')
+
+    # Outgoing mail queue (see app/mailer.py)
+    MAIL_WORKERS = int(os.environ.get('MAIL_WORKERS') or 2)
+    MAIL_QUEUE_SIZE = int(os.environ.get('MAIL_QUEUE_SIZE') or 1000)
+    MAIL_BATCH_SIZE = int(os.environ.get('MAIL_BATCH_SIZE') or 50)
+    MAIL_IDLE_TIMEOUT = float(os.environ.get('MAIL_IDLE_TIMEOUT') or 5)
+    MAIL_ENQUEUE_TIMEOUT = float(os.environ.get('MAIL_ENQUEUE_TIMEOUT') or 2)
+    MAIL_MAX_RETRIES = int(os.environ.get('MAIL_MAX_RETRIES') or 3)
+    MAIL_RETRY_BACKOFF = float(os.environ.get('MAIL_RETRY_BACKOFF') or 2)
\ No newline at end of file
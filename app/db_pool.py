@@ -0,0 +1,55 @@
+import threading
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+def pool_stats(engine):
+    """Current connection pool counters for an engine."""
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        return {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+        }
+    return {"status": pool.status()}
+
+def measure_pool_throughput(url, engine_options, pool_size, threads, duration, statement="SELECT 1", max_overflow=0):
+    """
+    Runs `threads` workers issuing `statement` against a fresh engine with the
+    given pool size for `duration` seconds. Returns queries per second and the
+    mean time spent waiting to check out a connection.
+
+    The configured max_overflow is replaced too (by default with 0), otherwise
+    every run could open pool_size + max_overflow connections and the pool
+    sizes being compared would barely differ.
+    """
+    options = dict(engine_options, pool_size=pool_size, max_overflow=max_overflow) if engine_options else {}
+    engine = create_engine(url, **options)
+    counts = [0] * threads
+    waits = [0.0] * threads
+    deadline = time.perf_counter() + duration
+
+    def worker(i):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            with engine.connect() as conn:
+                waits[i] += time.perf_counter() - started
+                conn.execute(text(statement)).fetchall()
+            counts[i] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    engine.dispose()
+
+    total = sum(counts)
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "queries_per_second": total / duration,
+        "mean_checkout_wait_ms": (sum(waits) / total * 1000) if total else None,
+    }
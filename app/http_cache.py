@@ -0,0 +1,19 @@
+import hashlib
+from flask import request, Response
+
+def make_etag(*parts):
+    """Builds a strong ETag from cheap version markers (counts, max ids, timestamps)."""
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+def not_modified(etag):
+    """Returns a 304 response if the client's If-None-Match already has etag, else None."""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        return with_etag(response, etag)
+    return None
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    # Let clients keep the body but make them revalidate before each reuse.
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
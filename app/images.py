@@ -0,0 +1,59 @@
+import atexit
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageOps
+
+def downscale_image(src_path, dest_path, max_dimension, image_format, quality):
+    """
+    Caps the image's longest side at max_dimension and re-encodes it. EXIF
+    and other metadata are dropped because nothing is passed through to save().
+    Runs in a worker process.
+    """
+    with Image.open(src_path) as image:
+        # JPEG can decode straight to a reduced scale, so full-size phone photos
+        # never have to be decompressed in memory.
+        image.draft('RGB', (max_dimension, max_dimension))
+        # Bake the orientation tag into the pixels before the EXIF is discarded.
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        if image_format == 'JPEG' and image.mode != 'RGB':
+            image = image.convert('RGB')
+        elif image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        image.save(dest_path, format=image_format, quality=quality, optimize=True)
+    return dest_path
+
+class ImageProcessor:
+    """
+    Downscales uploads on a process pool so the resizing and encoding don't hold
+    the GIL of the web or upload worker threads. Files Pillow can't read (e.g. a
+    PDF receipt) are passed through unchanged.
+
+    With IMAGE_WORKERS = 0 images are processed inline.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._executor = None
+
+    def init_app(self, app):
+        self.app = app
+        if app.config['IMAGE_WORKERS'] > 0:
+            self._executor = ProcessPoolExecutor(max_workers=app.config['IMAGE_WORKERS'])
+            atexit.register(self._executor.shutdown, wait=True)
+        app.extensions['image_processor'] = self
+
+    def process(self, src_path):
+        """Returns the path of the processed image, or src_path if it couldn't be processed."""
+        config = self.app.config
+        image_format = config['IMAGE_FORMAT']
+        args = (src_path, f"{src_path}.{image_format.lower()}", config['IMAGE_MAX_DIMENSION'], image_format, config['IMAGE_QUALITY'])
+        try:
+            if self._executor is None:
+                return downscale_image(*args)
+            return self._executor.submit(downscale_image, *args).result()
+        except Exception as e:
+            logging.warning(f"Uploading {src_path} unprocessed: {e}")
+            return src_path
+
+image_processor = ImageProcessor()
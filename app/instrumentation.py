@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from flask import g, has_request_context, request, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds of the Prometheus histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def render(self, name, labels):
+        lines = [f'{name}_bucket{{{labels},le="{bound}"}} {n}' for bound, n in zip(self.buckets, self.counts)]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+class EndpointStats:
+    def __init__(self):
+        self.duration = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self.slow_queries = 0
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'request_metrics' in g:
+        conn.info['query_started_at'] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = conn.info.pop('query_started_at', None)
+    if started_at is None or not has_request_context() or 'request_metrics' not in g:
+        return
+    elapsed = time.perf_counter() - started_at
+    metrics = g.request_metrics
+    metrics['queries'] += 1
+    metrics['db'] += elapsed
+    if elapsed >= current_app.config['METRICS_SLOW_QUERY_SECONDS']:
+        metrics['slow'] += 1
+        logging.warning(f"Slow query in {request.endpoint} ({elapsed * 1000:.0f} ms): {statement[:500]}")
+
+class RequestMetrics:
+    """
+    Opt-in (METRICS_ENABLED) per-endpoint counters: SQL statements, time spent
+    in the database, time spent serializing JSON and wall time for each request.
+
+    Every response gets a Server-Timing header with that request's numbers, and
+    the running totals are rendered as Prometheus text by the /metrics route.
+    Totals are per process; scrape every worker or sum them downstream.
+    When disabled nothing is hooked in and requests pay nothing.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self._stats = defaultdict(EndpointStats)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config['METRICS_ENABLED']
+        app.extensions['request_metrics'] = self
+        if not self.enabled:
+            return
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.json.dumps = self._timed(app.json.dumps)
+
+    def _timed(self, dumps):
+        def timed_dumps(obj, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                return dumps(obj, **kwargs)
+            finally:
+                if has_request_context() and 'request_metrics' in g:
+                    g.request_metrics['serialization'] += time.perf_counter() - started_at
+        return timed_dumps
+
+    def _start(self):
+        g.request_metrics = {'started_at': time.perf_counter(), 'queries': 0, 'db': 0.0, 'serialization': 0.0, 'slow': 0}
+
+    def _finish(self, response):
+        metrics = g.pop('request_metrics', None)
+        if metrics is None:
+            return response
+        wall = time.perf_counter() - metrics['started_at']
+        response.headers['Server-Timing'] = (
+            f'db;dur={metrics["db"] * 1000:.2f};desc="{metrics["queries"]} queries", '
+            f'serialize;dur={metrics["serialization"] * 1000:.2f}, '
+            f'total;dur={wall * 1000:.2f}'
+        )
+        with self._lock:
+            stats = self._stats[request.endpoint or 'unmatched']
+            stats.duration.observe(wall)
+            stats.queries.observe(metrics['queries'])
+            stats.db_seconds += metrics['db']
+            stats.serialization_seconds += metrics['serialization']
+            stats.slow_queries += metrics['slow']
+        return response
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            stats = sorted(self._stats.items())
+            families = [
+                ('http_request_duration_seconds', 'histogram', 'Wall time per request.',
+                 lambda s, labels: s.duration.render('http_request_duration_seconds', labels)),
+                ('http_request_db_queries', 'histogram', 'SQL statements executed per request.',
+                 lambda s, labels: s.queries.render('http_request_db_queries', labels)),
+                ('http_request_db_seconds_total', 'counter', 'Time spent executing SQL.',
+                 lambda s, labels: [f'http_request_db_seconds_total{{{labels}}} {s.db_seconds:.6f}']),
+                ('http_request_serialization_seconds_total', 'counter', 'Time spent encoding JSON responses.',
+                 lambda s, labels: [f'http_request_serialization_seconds_total{{{labels}}} {s.serialization_seconds:.6f}']),
+                ('http_request_slow_queries_total', 'counter', 'Statements slower than METRICS_SLOW_QUERY_SECONDS.',
+                 lambda s, labels: [f'http_request_slow_queries_total{{{labels}}} {s.slow_queries}']),
+            ]
+            lines = []
+            for name, kind, help_text, render in families:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for endpoint, endpoint_stats in stats:
+                    lines.extend(render(endpoint_stats, f'endpoint="{endpoint}"'))
+        return '\n'.join(lines) + '\n'
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,168 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+from flask import current_app
+from flask_mail import Message
+from .extensions import mail
+
+MailJob = namedtuple('MailJob', ['message', 'attempts'])
+
+class MailQueue:
+    """
+    One app's bounded outgoing-mail queue, drained by a fixed pool of worker
+    threads that start with the first send(), so CLI commands that never send
+    mail don't start any.
+
+    Each worker holds one SMTP connection open while there is mail to send,
+    taking up to MAIL_BATCH_SIZE messages at a time and closing the connection
+    after MAIL_IDLE_TIMEOUT seconds without new mail. When the queue is full,
+    send() blocks for up to MAIL_ENQUEUE_TIMEOUT seconds and then drops the
+    message. A failed message is retried on a new connection up to
+    MAIL_MAX_RETRIES times. Queued mail is flushed before the process exits.
+
+    With MAIL_WORKERS = 0 mail is sent inline.
+    """
+
+    def __init__(self, app, workers=None):
+        self.app = app
+        self.worker_count = app.config['MAIL_WORKERS'] if workers is None else workers
+        self._queue = queue.Queue(maxsize=app.config['MAIL_QUEUE_SIZE'])
+        self._workers = []
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def _ensure_started(self):
+        if self._workers:
+            return
+        with self._start_lock:
+            if self._workers:
+                return
+            for i in range(self.worker_count):
+                worker = threading.Thread(target=self._run, name=f'mail-dispatch-{i}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            # Let queued mail go out before the process exits.
+            atexit.register(self.shutdown)
+
+    def send(self, message):
+        """Queues message for delivery. Returns False if it had to be dropped."""
+        if self.worker_count == 0 or self._stopping.is_set():
+            mail.send(message)
+            return True
+        self._ensure_started()
+        try:
+            self._queue.put(MailJob(message, 0), timeout=self.app.config['MAIL_ENQUEUE_TIMEOUT'])
+            return True
+        except queue.Full:
+            logging.error(f"Mail queue full, dropping email to {message.recipients}")
+            return False
+
+    def shutdown(self, timeout=30):
+        """Stops accepting work once the queue is empty and waits for the workers to finish."""
+        self._stopping.set()
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def _take_batch(self, timeout):
+        try:
+            batch = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.app.config['MAIL_BATCH_SIZE']:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _wait_for_batch(self, timeout):
+        """Like _take_batch, but stops waiting for more mail as soon as shutdown starts."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if self._stopping.is_set() or remaining <= 0:
+                return self._take_batch(timeout=0)
+            batch = self._take_batch(timeout=min(remaining, 0.5))
+            if batch:
+                return batch
+
+    def _retry(self, job):
+        if job.attempts >= self.app.config['MAIL_MAX_RETRIES']:
+            logging.error(f"Giving up on email to {job.message.recipients} after {job.attempts + 1} attempts")
+            return
+        try:
+            self._queue.put_nowait(job._replace(attempts=job.attempts + 1))
+        except queue.Full:
+            logging.error(f"Mail queue full, dropping retry of email to {job.message.recipients}")
+
+    def _send_session(self, batch):
+        """Sends batch, and whatever else arrives before the idle timeout, over one connection."""
+        unsent = list(batch)
+        try:
+            with mail.connect() as connection:
+                while unsent:
+                    while unsent:
+                        connection.send(unsent[0].message)
+                        unsent.pop(0)
+                    unsent = self._wait_for_batch(self.app.config['MAIL_IDLE_TIMEOUT'])
+        except Exception as e:
+            logging.error(f"Error sending email batch: {e}", exc_info=True)
+            # Only the message being sent counts the failure; the rest just go back in the queue.
+            # Nothing is left unsent when closing the connection is what failed.
+            if unsent:
+                self._retry(unsent[0])
+                for job in unsent[1:]:
+                    self._retry(job._replace(attempts=job.attempts - 1))
+            time.sleep(self.app.config['MAIL_RETRY_BACKOFF'])
+
+    def _run(self):
+        with self.app.app_context():
+            while not (self._stopping.is_set() and self._queue.empty()):
+                try:
+                    batch = self._take_batch(timeout=0.5)
+                    if batch:
+                        self._send_session(batch)
+                except Exception as e:
+                    # A worker that dies takes its share of the queue's throughput with it.
+                    logging.error(f"Mail worker error: {e}", exc_info=True)
+
+class MailDispatcher:
+    """
+    Extension entry point. init_app gives each app its own MailQueue in
+    app.extensions; send() and shutdown() act on the current app's queue.
+    """
+
+    def init_app(self, app):
+        app.extensions['mail_dispatcher'] = MailQueue(app)
+
+    def send(self, message):
+        return current_app.extensions['mail_dispatcher'].send(message)
+
+    def shutdown(self, timeout=30):
+        current_app.extensions['mail_dispatcher'].shutdown(timeout)
+
+mail_dispatcher = MailDispatcher()
+
+def measure_mail_throughput(app, count, workers):
+    """
+    Sends `count` test messages to the configured SMTP server and returns
+    messages per second. With workers = 0 each message opens its own
+    connection, as mail.send() does; otherwise they go through a MailQueue
+    with that many workers, timed until shutdown() has flushed it.
+    """
+    messages = [Message(f"Throughput test {i}", recipients=['bench@example.com'], body="test",
+                        sender=app.config['MAIL_DEFAULT_SENDER'] or 'bench@example.com') for i in range(count)]
+    started = time.perf_counter()
+    if workers == 0:
+        for message in messages:
+            mail.send(message)
+    else:
+        mail_queue = MailQueue(app, workers)
+        for message in messages:
+            mail_queue.send(message)
+        mail_queue.shutdown()
+    elapsed = time.perf_counter() - started
+    return {"workers": workers, "messages": count, "seconds": elapsed, "messages_per_second": count / elapsed}
@@ -0,0 +1,29 @@
+from datetime import datetime
+from .extensions import db
+from .models import UserPackage
+
+def sweep_matured_packages(batch_size=1000, now=None):
+    """
+    Flags every paid package past its expiry date as matured, batch_size rows
+    per UPDATE so no single statement holds locks on the whole table. Each batch
+    is found through the (status, is_matured, expiry_date) index.
+
+    Returns the number of packages flagged.
+    """
+    now = now or datetime.utcnow()
+    total = 0
+    while True:
+        ids = [row.id for row in db.session.query(UserPackage.id).filter(
+            UserPackage.status == 'paid',
+            UserPackage.is_matured == False,
+            UserPackage.expiry_date <= now
+        ).limit(batch_size)]
+        if not ids:
+            break
+        db.session.query(UserPackage).filter(UserPackage.id.in_(ids))\
+            .update({UserPackage.is_matured: True}, synchronize_session=False)
+        db.session.commit()
+        total += len(ids)
+        if len(ids) < batch_size:
+            break
+    return total
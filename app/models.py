@@ -1,6 +1,9 @@
 from .extensions import db
+from sqlalchemy import literal_column
+from sqlalchemy.dialects import mysql
 from datetime import datetime
 import secrets
+from .serializers import USER_FIELDS, PACKAGE_FIELDS, USER_PACKAGE_FIELDS, WITHDRAWAL_FIELDS, WITHDRAWAL_METHOD_FIELDS
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -9,20 +12,17 @@ class User(db.Model):
     first_name = db.Column(db.String(80), nullable=False)
     is_admin = db.Column(db.Boolean, default=False, nullable=False)
     referral_code = db.Column(db.String(10), unique=True, nullable=False, default=lambda: secrets.token_hex(5))
-    referred_by_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    referred_by_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True)
+    # Running total of referral commission, credited when a referred user's
+    # first package is approved. Rebuild with `flask rebuild-commissions`.
+    commission_earned = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
     
     packages = db.relationship('UserPackage', backref='user', lazy=True)
     referrals = db.relationship('User', backref=db.backref('referrer', remote_side=[id]), lazy='dynamic')
     withdrawal_requests = db.relationship('WithdrawalRequest', backref='user', lazy=True)
 
     def to_dict(self):
-        return {
-            "id": self.id, 
-            "telegram_id": self.telegram_id, 
-            "first_name": self.first_name, 
-            "is_admin": self.is_admin,
-            "referral_code": self.referral_code
-        }
+        return USER_FIELDS.one(self)
 
 class Package(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -36,17 +36,7 @@ class Package(db.Model):
     image_url = db.Column(db.String(255), nullable=True)
 
     def to_dict(self):
-        return {
-            "id": self.id, 
-            "name": self.name, 
-            "min_price": self.min_price,
-            "max_price": self.max_price,
-            "min_price_usd": self.min_price_usd,
-            "max_price_usd": self.max_price_usd,
-            "duration_days": self.duration_days, 
-            "dividend_percentage": self.dividend_percentage,
-            "image_url": self.image_url
-        }
+        return PACKAGE_FIELDS.one(self)
 
 class UserPackage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -56,35 +46,60 @@ class UserPackage(db.Model):
     status = db.Column(db.String(20), nullable=False, default='pending')
     purchase_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     activation_date = db.Column(db.DateTime, nullable=True)
+    # When the package was first approved. activation_date moves on every
+    # renewal; this doesn't, so it decides which package earned the referral commission.
+    first_activation_date = db.Column(db.DateTime, nullable=True)
     expiry_date = db.Column(db.DateTime, nullable=True)
     rejection_reason = db.Column(db.String(255), nullable=True)
     
     total_withdrawn = db.Column(db.Float, nullable=False, default=0.0)
+    # Set by `flask sweep-matured` once a paid package passes its expiry date;
+    # cleared whenever the package starts a new cycle.
+    is_matured = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    updated_at = db.Column(
+        db.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql'),
+        nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+    # Bumped by every UPDATE of the row, ORM or Core. The dashboard ETag sums
+    # these rather than taking max(updated_at), which comes from each app
+    # server's own clock and can miss a write from one that runs behind.
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1',
+                        onupdate=literal_column('version') + 1)
 
     package = db.relationship('Package')
     withdrawal_request = db.relationship('WithdrawalRequest', backref='user_package', uselist=False, cascade="all, delete-orphan")
     
     payment_method = db.Column(db.String(50), nullable=True)
     payment_proof_url = db.Column(db.String(255), nullable=True)
+    # SHA-256 of the uploaded proof file, used to spot reused screenshots
+    payment_proof_hash = db.Column(db.String(64), nullable=True, index=True)
     depositor_name = db.Column(db.String(120), nullable=True)
     depositor_bank = db.Column(db.String(120), nullable=True)
     deposited_amount = db.Column(db.Float, nullable=True)
 
+    __table_args__ = (
+        # User dashboard/history, newest first
+        db.Index('ix_user_package_user_id_purchase_date', 'user_id', 'purchase_date'),
+        # Admin pending queue, by status then date
+        db.Index('ix_user_package_status_purchase_date', 'status', 'purchase_date'),
+        # Admin history: walked newest first, filtering status as it goes, so
+        # pages come straight off the index without a sort
+        db.Index('ix_user_package_purchase_date_id', 'purchase_date', 'id'),
+        # First paid package per referred user (referral commission)
+        db.Index('ix_user_package_user_id_status_activation_date', 'user_id', 'status', 'activation_date'),
+        # Maturity sweep
+        db.Index('ix_user_package_status_is_matured_expiry_date', 'status', 'is_matured', 'expiry_date'),
+    )
+
     def to_dict(self):
-        package_info = self.package.to_dict() if self.package else {}
-        return {
-            "user_package_id": self.id,
-            "package_name": package_info.get('name'),
-            "investment_amount": self.investment_amount,
-            "total_withdrawn": self.total_withdrawn,
-            "package_dividend_percentage": package_info.get('dividend_percentage'),
-            "status": self.status,
-            "purchase_date": self.purchase_date.isoformat() if self.purchase_date else None,
-            "activation_date": self.activation_date.isoformat() if self.activation_date else None,
-            "expiry_date": self.expiry_date.isoformat() if self.expiry_date else None,
-            "rejection_reason": self.rejection_reason,
-            "payment_method": self.payment_method
-        }
+        return USER_PACKAGE_FIELDS.one(self)
+
+class PaymentProof(db.Model):
+    """Uploaded proof files by content hash, so identical re-uploads reuse the stored copy."""
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)
+    secure_url = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
 class WithdrawalRequest(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -103,25 +118,14 @@ class WithdrawalRequest(db.Model):
     wallet_address = db.Column(db.String(255), nullable=True)
     crypto_network = db.Column(db.String(50), nullable=True)
 
+    __table_args__ = (
+        # Admin withdrawal queue
+        db.Index('ix_withdrawal_request_status_request_date', 'status', 'request_date'),
+    )
+
     def to_dict(self):
-        data = {
-            "withdrawal_id": self.id,
-            "user_name": self.user.first_name,
-            "package_name": self.user_package.package.name,
-            "amount": self.amount,
-            "status": self.status,
-            "request_date": self.request_date.isoformat(),
-            "withdrawal_method": self.withdrawal_method
-        }
-        if self.withdrawal_method == 'bank_transfer':
-            data.update({
-                "account_name": self.account_name,
-                "account_number": self.account_number,
-                "bank_name": self.bank_name
-            })
-        elif self.withdrawal_method == 'crypto':
-            data.update({
-                "wallet_address": self.wallet_address,
-                "crypto_network": self.crypto_network
-            })
-        return data
\ No newline at end of file
+        data = WITHDRAWAL_FIELDS.one(self)
+        method_fields = WITHDRAWAL_METHOD_FIELDS.get(self.withdrawal_method)
+        if method_fields:
+            data.update(method_fields.one(self))
+        return data
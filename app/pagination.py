@@ -0,0 +1,73 @@
+import base64
+import json
+from datetime import datetime
+from flask import request, jsonify
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+class InvalidPageRequest(ValueError):
+    """Raised when the `limit` or `cursor` query parameters can't be used."""
+
+def encode_cursor(sort_value, row_id):
+    """Packs the (timestamp, id) of the last row on a page into an opaque token."""
+    raw = json.dumps([sort_value.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, TypeError):
+        raise InvalidPageRequest("Invalid cursor")
+
+def get_page_limit():
+    limit = request.args.get('limit')
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise InvalidPageRequest("Invalid limit")
+    if limit < 1:
+        raise InvalidPageRequest("Invalid limit")
+    return min(limit, MAX_PAGE_SIZE)
+
+def paginate(query, sort_column, id_column, descending=False):
+    """
+    Applies keyset pagination on (sort_column, id_column) using the `limit` and
+    `cursor` request arguments. The id column breaks ties between rows sharing a
+    timestamp, so every page starts exactly where the previous one stopped and the
+    database seeks straight to it instead of scanning past an OFFSET.
+
+    Returns the rows for this page and the cursor for the next one (None on the
+    last page).
+    """
+    limit = get_page_limit()
+    cursor = request.args.get('cursor')
+
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        # A row-value comparison lets the database seek into the index at the
+        # cursor; the equivalent OR of two conditions makes it scan from the top.
+        key, position = tuple_(sort_column, id_column), tuple_(sort_value, row_id)
+        query = query.filter(key < position if descending else key > position)
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    # Fetch one extra row to learn whether another page exists.
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
+
+def page_response(items, next_cursor):
+    return jsonify({"items": items, "next_cursor": next_cursor})
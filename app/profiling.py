@@ -0,0 +1,82 @@
+import cProfile
+import logging
+import os
+import re
+import time
+import uuid
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+
+PROFILE_HEADER = 'X-Profile-Token'
+
+class RequestProfiler:
+    """
+    Runs a single request under cProfile when it carries a valid X-Profile-Token
+    header. Tokens are signed with SECRET_KEY and expire after
+    PROFILE_TOKEN_MAX_AGE seconds; mint one with `flask profile-token`.
+
+    The profile is saved to PROFILE_DIR in pstats format (open it with snakeviz,
+    or turn it into a flamegraph with flameprof or gprof2dot) and its file name
+    is returned in the X-Profile-File response header.
+
+    Only installed when PROFILING_ENABLED is on; otherwise requests don't pass
+    through it at all.
+    """
+
+    def __init__(self):
+        self.app = None
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['request_profiler'] = self
+        if not app.config['PROFILING_ENABLED']:
+            return
+        os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+        app.wsgi_app = self._wrap(app.wsgi_app)
+
+    def _serializer(self):
+        return URLSafeTimedSerializer(self.app.config['SECRET_KEY'], salt='request-profile')
+
+    def issue_token(self):
+        return self._serializer().dumps('profile')
+
+    def _authorized(self, token):
+        try:
+            self._serializer().loads(token, max_age=self.app.config['PROFILE_TOKEN_MAX_AGE'])
+            return True
+        except BadSignature:
+            logging.warning("Ignoring request with an invalid or expired profile token")
+            return False
+
+    def _wrap(self, wsgi_app):
+        environ_key = 'HTTP_' + PROFILE_HEADER.upper().replace('-', '_')
+
+        def middleware(environ, start_response):
+            token = environ.get(environ_key)
+            if token is None or not self._authorized(token):
+                return wsgi_app(environ, start_response)
+            return self._profile(wsgi_app, environ, start_response)
+        return middleware
+
+    def _profile(self, wsgi_app, environ, start_response):
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', environ.get('PATH_INFO', '')).strip('-') or 'root'
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{environ.get('REQUEST_METHOD', 'GET')}-{slug}-{uuid.uuid4().hex[:6]}.prof"
+
+        def start_profiled_response(status, headers, exc_info=None):
+            return start_response(status, headers + [('X-Profile-File', filename)], exc_info)
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            # Drain the body inside the profile so streamed responses are counted too.
+            app_iter = wsgi_app(environ, start_profiled_response)
+            try:
+                body = list(app_iter)
+            finally:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+        finally:
+            profiler.disable()
+            profiler.dump_stats(os.path.join(self.app.config['PROFILE_DIR'], filename))
+        return body
+
+request_profiler = RequestProfiler()
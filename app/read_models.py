@@ -0,0 +1,113 @@
+from sqlalchemy import func
+from .extensions import db
+from .models import User, Package, UserPackage
+from .serializers import Fields, isoformat
+
+# Each query selects only the columns its view returns and yields Row named
+# tuples rather than identity-mapped entities. The row's `id` is always the
+# UserPackage id and `purchase_date` is always present, so the queries can be
+# handed straight to paginate(). The Fields spec next to each query turns its
+# rows into the response items.
+
+def user_packages_query(user_id):
+    """A user's packages for the dashboard and history."""
+    return db.session.query(
+        UserPackage.id,
+        Package.name.label('package_name'),
+        UserPackage.investment_amount,
+        UserPackage.total_withdrawn,
+        Package.dividend_percentage.label('package_dividend_percentage'),
+        UserPackage.status,
+        UserPackage.purchase_date,
+        UserPackage.activation_date,
+        UserPackage.expiry_date,
+        UserPackage.is_matured,
+        UserPackage.rejection_reason,
+        UserPackage.payment_method,
+    ).join(Package, UserPackage.package_id == Package.id).filter(UserPackage.user_id == user_id)
+
+USER_PACKAGE_ROW_FIELDS = Fields(
+    ('user_package_id', 'id'),
+    'package_name',
+    'investment_amount',
+    'total_withdrawn',
+    'package_dividend_percentage',
+    'status',
+    ('purchase_date', 'purchase_date', isoformat),
+    ('activation_date', 'activation_date', isoformat),
+    ('expiry_date', 'expiry_date', isoformat),
+    'is_matured',
+    'rejection_reason',
+    'payment_method',
+)
+
+def pending_packages_query():
+    """Packages with a proof or bank details awaiting admin review, with the submitting user."""
+    return db.session.query(
+        UserPackage.id,
+        User.id.label('user_id'),
+        User.telegram_id,
+        User.first_name,
+        User.is_admin,
+        User.referral_code,
+        Package.name.label('package_name'),
+        UserPackage.investment_amount,
+        UserPackage.total_withdrawn,
+        Package.dividend_percentage.label('package_dividend_percentage'),
+        UserPackage.status,
+        UserPackage.purchase_date,
+        UserPackage.activation_date,
+        UserPackage.expiry_date,
+        UserPackage.is_matured,
+        UserPackage.rejection_reason,
+        UserPackage.payment_method,
+        UserPackage.payment_proof_url,
+        UserPackage.payment_proof_hash,
+        UserPackage.depositor_name,
+        UserPackage.depositor_bank,
+        UserPackage.deposited_amount,
+    ).join(User, UserPackage.user_id == User.id).join(Package, UserPackage.package_id == Package.id)\
+        .filter(UserPackage.status == 'pending')\
+        .filter((UserPackage.payment_proof_url != None) | (UserPackage.depositor_name != None))
+
+PENDING_PACKAGE_ROW_FIELDS = Fields(
+    ('id', 'user_id'),
+    'telegram_id',
+    'first_name',
+    'is_admin',
+    'referral_code',
+) + USER_PACKAGE_ROW_FIELDS
+
+AWAITING_PAYMENT_STATUSES = ('pending', 'proof_processing')
+
+def admin_history_query():
+    """
+    Packages an admin has acted on, with the date of the last decision.
+
+    That is every package past the payment stage (paid, rejected, expired or
+    withdrawn), which is most of the table, so the page is read by walking
+    (purchase_date, id) newest first and skipping the rest. The filter is
+    written as NOT IN so SQLite can't pick the (status, purchase_date) index
+    and then sort nearly the whole table on every page; MySQL can split NOT IN
+    into ranges, so it gets an index hint as well.
+    """
+    return db.session.query(
+        UserPackage.id,
+        User.first_name.label('user_name'),
+        Package.name.label('package_name'),
+        UserPackage.status,
+        UserPackage.purchase_date,
+        func.coalesce(UserPackage.activation_date, UserPackage.purchase_date).label('date'),
+        UserPackage.rejection_reason,
+    ).join(User, UserPackage.user_id == User.id).join(Package, UserPackage.package_id == Package.id)\
+        .filter(UserPackage.status.notin_(AWAITING_PAYMENT_STATUSES))\
+        .with_hint(UserPackage, 'FORCE INDEX (ix_user_package_purchase_date_id)', 'mysql')
+
+ADMIN_HISTORY_ROW_FIELDS = Fields(
+    ('user_package_id', 'id'),
+    'user_name',
+    'package_name',
+    'status',
+    ('date', 'date', isoformat),
+    ('reason', 'rejection_reason'),
+)
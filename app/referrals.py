@@ -0,0 +1,75 @@
+from sqlalchemy import func, update, bindparam
+from .extensions import db
+from .models import User, UserPackage
+
+REFERRAL_COMMISSION_RATE = 0.02
+
+def first_activated_packages(referrer_ids):
+    """
+    Subquery ranking each referred user's approved packages in the order they
+    were first approved, so rn == 1 picks out the package that earned the
+    referrer their commission. Packages approved together are taken in
+    purchase order, as credit_referral_commissions() does.
+    """
+    rank = func.row_number().over(
+        partition_by=UserPackage.user_id,
+        order_by=(UserPackage.first_activation_date.asc(), UserPackage.purchase_date.asc(), UserPackage.id.asc())
+    )
+    return db.session.query(
+        User.referred_by_id.label('referrer_id'),
+        UserPackage.investment_amount.label('investment_amount'),
+        rank.label('rn')
+    ).join(User, User.id == UserPackage.user_id).filter(
+        User.referred_by_id.in_(referrer_ids),
+        UserPackage.first_activation_date != None
+    ).subquery()
+
+def commission_totals(referrer_ids):
+    """
+    Recomputes {referrer_id: commission} from UserPackage history in one query.
+    Used to backfill and verify User.commission_earned.
+    """
+    ranked = first_activated_packages(referrer_ids)
+    rows = db.session.query(
+        ranked.c.referrer_id, func.sum(ranked.c.investment_amount)
+    ).filter(ranked.c.rn == 1).group_by(ranked.c.referrer_id).all()
+    return {referrer_id: total * REFERRAL_COMMISSION_RATE for referrer_id, total in rows}
+
+def credit_referral_commissions(user_packages):
+    """
+    Credits referrers for any of the given packages that is their referred
+    user's first package to be approved. Pass only packages being activated
+    for the first time; the caller commits.
+    """
+    first_by_user = {}
+    for up in sorted(user_packages, key=lambda up: (up.purchase_date, up.id)):
+        first_by_user.setdefault(up.user_id, up)
+    if not first_by_user:
+        return
+
+    package_ids = [up.id for up in user_packages]
+    already_active = {user_id for (user_id,) in db.session.query(UserPackage.user_id).filter(
+        UserPackage.user_id.in_(first_by_user),
+        UserPackage.first_activation_date != None,
+        UserPackage.id.notin_(package_ids)
+    ).distinct()}
+
+    referrers = db.session.query(User.id, User.referred_by_id).filter(
+        User.id.in_(set(first_by_user) - already_active),
+        User.referred_by_id != None
+    ).all()
+
+    credits = {}
+    for user_id, referrer_id in referrers:
+        amount = first_by_user[user_id].investment_amount * REFERRAL_COMMISSION_RATE
+        credits[referrer_id] = credits.get(referrer_id, 0) + amount
+    if not credits:
+        return
+
+    user_table = User.__table__
+    db.session.execute(
+        update(user_table)
+        .where(user_table.c.id == bindparam('referrer_id'))
+        .values(commission_earned=user_table.c.commission_earned + bindparam('amount')),
+        [{"referrer_id": referrer_id, "amount": amount} for referrer_id, amount in credits.items()]
+    )
@@ -0,0 +1,176 @@
+import functools
+from contextlib import contextmanager
+import logging
+import random
+import threading
+import time
+from flask import g, request, has_request_context
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, text
+
+RECENT_WRITES_HEADER = 'X-Recent-Writes'
+
+class ReplicaRouter:
+    """
+    Chooses a read replica for SELECTs issued by views marked @read_only.
+
+    A replica is used only while its replication lag, checked at most every
+    REPLICA_HEALTH_CHECK_INTERVAL seconds, is within REPLICA_MAX_LAG; otherwise
+    reads fall back to the primary. After a write, callers pass a scope (e.g.
+    'user:42') to mark_written, and reads in that scope stay on the primary
+    for READ_YOUR_WRITES_WINDOW seconds.
+
+    Each process remembers its own recent writes, which covers other clients
+    landing on the same worker. The writing client also gets its scopes and
+    write times back in a signed X-Recent-Writes response header; sending the
+    latest value back on later requests keeps its reads on the primary
+    whichever worker serves them.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._replica_keys = []
+        self._health = {}  # bind key -> (healthy, checked_at)
+        self._health_lock = threading.Lock()
+        self._recent_writes = {}  # scope -> time of last write
+        self._writes_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self._replica_keys = sorted(key for key in app.config.get('SQLALCHEMY_BINDS') or {} if key.startswith('replica_'))
+        app.after_request(self._send_client_writes)
+        app.extensions['replica_router'] = self
+
+    def _serializer(self):
+        return URLSafeTimedSerializer(self.app.config['SECRET_KEY'], salt='recent-writes')
+
+    def _client_writes(self):
+        """{scope: unix time} from the request's X-Recent-Writes header, or {} if absent, forged or expired."""
+        if 'client_writes' not in g:
+            token = request.headers.get(RECENT_WRITES_HEADER)
+            writes = {}
+            if token:
+                try:
+                    writes = self._serializer().loads(token, max_age=self.app.config['READ_YOUR_WRITES_WINDOW'])
+                except BadSignature:
+                    pass
+            g.client_writes = writes if isinstance(writes, dict) else {}
+        return g.client_writes
+
+    def _send_client_writes(self, response):
+        written = g.pop('written_scopes', None)
+        if written:
+            now = time.time()
+            window = self.app.config['READ_YOUR_WRITES_WINDOW']
+            writes = {s: t for s, t in self._client_writes().items() if now - t < window}
+            writes.update(dict.fromkeys(written, now))
+            response.headers[RECENT_WRITES_HEADER] = self._serializer().dumps(writes)
+        return response
+
+    def mark_written(self, scope):
+        now = time.monotonic()
+        window = self.app.config['READ_YOUR_WRITES_WINDOW']
+        with self._writes_lock:
+            self._recent_writes[scope] = now
+            # Keep the map from growing without bound.
+            if len(self._recent_writes) > 10000:
+                self._recent_writes = {s: t for s, t in self._recent_writes.items() if now - t < window}
+        if has_request_context():
+            g.setdefault('written_scopes', set()).add(scope)
+
+    def recently_written(self, scope):
+        window = self.app.config['READ_YOUR_WRITES_WINDOW']
+        written_at = self._recent_writes.get(scope)
+        if written_at is not None and time.monotonic() - written_at < window:
+            return True
+        client_written_at = self._client_writes().get(scope) if has_request_context() else None
+        return client_written_at is not None and time.time() - client_written_at < window
+
+    def _replication_lag(self, engine):
+        with engine.connect() as conn:
+            if engine.dialect.name != 'mysql':
+                conn.execute(text("SELECT 1"))
+                return 0
+            try:
+                status = conn.execute(text("SHOW REPLICA STATUS")).mappings().first()
+            except Exception:
+                # MySQL before 8.0.22
+                status = conn.execute(text("SHOW SLAVE STATUS")).mappings().first()
+            if status is None:
+                return 0  # not configured as a replica, e.g. a local stand-in
+            return status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+
+    def _is_healthy(self, key, engine):
+        healthy, checked_at = self._health.get(key, (False, None))
+        interval = self.app.config['REPLICA_HEALTH_CHECK_INTERVAL']
+        if checked_at is not None and time.monotonic() - checked_at < interval:
+            return healthy
+        # One thread re-checks; the others keep using the last result meanwhile.
+        if not self._health_lock.acquire(blocking=False):
+            return healthy
+        try:
+            try:
+                lag = self._replication_lag(engine)
+                healthy = lag is not None and lag <= self.app.config['REPLICA_MAX_LAG']
+                if not healthy:
+                    logging.warning(f"Replica {key} lag is {lag}s, reading from primary")
+            except Exception as e:
+                logging.warning(f"Replica {key} unavailable, reading from primary: {e}")
+                healthy = False
+            self._health[key] = (healthy, time.monotonic())
+            return healthy
+        finally:
+            self._health_lock.release()
+
+    def pick(self, engines):
+        candidates = [key for key in self._replica_keys if key in engines and self._is_healthy(key, engines[key])]
+        return engines[random.choice(candidates)] if candidates else None
+
+    def routes_to_replica(self, clause):
+        return (
+            self._replica_keys
+            and has_request_context()
+            and g.get('read_only', False)
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+        )
+
+replica_router = ReplicaRouter()
+
+class RoutingSession(Session):
+    """Sends SELECTs from @read_only views to a healthy replica; everything else goes to the primary."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and replica_router.routes_to_replica(clause):
+            engine = replica_router.pick(self._db.engines)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@contextmanager
+def primary():
+    """Sends the enclosed queries to the primary, even inside a @read_only view."""
+    if not has_request_context():
+        yield
+        return
+    previous = g.get('read_only', False)
+    g.read_only = False
+    try:
+        yield
+    finally:
+        g.read_only = previous
+
+def read_only(scope=None):
+    """
+    Marks a GET view as safe to serve from a replica. `scope` is formatted with
+    the view arguments (e.g. 'user:{user_id}'); if that scope wrote recently the
+    view reads from the primary instead so the client sees its own changes.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            g.read_only = not (scope and replica_router.recently_written(scope.format(**kwargs)))
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,61 +1,124 @@
-from flask import request, jsonify, Blueprint
-from datetime import datetime, timedelta
-from .models import User, Package, UserPackage, WithdrawalRequest
+from flask import request, jsonify, Blueprint, Response, abort, current_app
+from datetime import datetime
+from .models import User, Package, UserPackage, WithdrawalRequest, PaymentProof
 from .extensions import db
-import cloudinary.uploader
-import secrets
+from .pagination import paginate, page_response, InvalidPageRequest
+from .referrals import credit_referral_commissions
+from .cache import package_catalog, user_cache
+from .http_cache import make_etag, not_modified, with_etag
+from .business_days import calculate_expiry_date, get_calendar
+from .uploads import proof_uploads
+from .images import image_processor
+from .db_pool import pool_stats
+from .instrumentation import request_metrics
+from .read_models import (
+    user_packages_query, USER_PACKAGE_ROW_FIELDS, pending_packages_query, PENDING_PACKAGE_ROW_FIELDS,
+    admin_history_query, ADMIN_HISTORY_ROW_FIELDS
+)
+from .replicas import replica_router, read_only
+from .users import upsert_user
+from .auth import (
+    AuthError, issue_token, validate_init_data, check_user_access, user_required, admin_required,
+    verified_admin_required
+)
+from sqlalchemy import func, case, update, delete
+from sqlalchemy.orm import joinedload
 import logging
+import os
+import tempfile
 
 api = Blueprint('api', __name__)
 
-def calculate_expiry_date(start_date, working_days):
-    current_date = start_date
-    days_added = 0
-    while days_added < working_days:
-        current_date += timedelta(days=1)
-        if current_date.weekday() < 5:
-            days_added += 1
-    return current_date
+MAX_BATCH_SIZE = 500
+
+def user_packages_etag(user_id):
+    """
+    ETag for a page of a user's packages. Any insert, update or delete of their
+    rows moves the count, max id or sum of row versions, and the catalog ETag
+    covers the package names and dividends embedded in each row.
+    """
+    count, max_id, versions = db.session.query(
+        func.count(UserPackage.id), func.max(UserPackage.id), func.sum(UserPackage.version)
+    ).filter_by(user_id=user_id).one()
+    return make_etag(request.path, request.query_string.decode(), count, max_id, versions, package_catalog.get_etag())
+
+def get_batch_ids(data, key):
+    """
+    Reads a de-duplicated list of integer ids from data[key], keeping the order
+    given. Returns None if the list is missing, malformed or too long.
+    """
+    ids = (data or {}).get(key)
+    if not isinstance(ids, list) or not ids or len(ids) > MAX_BATCH_SIZE:
+        return None
+    # bool is an int subclass; int() would also quietly accept floats and numeric strings.
+    if not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        return None
+    return list(dict.fromkeys(ids))
+
+def lock_pending_candidates(user_package_ids):
+    """
+    Loads and row-locks the given packages with their Package in one query.
+    SKIP LOCKED leaves out rows another admin is processing right now, so two
+    batches never act on the same package.
+    """
+    return UserPackage.query.options(joinedload(UserPackage.package))\
+        .filter(UserPackage.id.in_(user_package_ids))\
+        .with_for_update(skip_locked=True, of=UserPackage).all()
+
+@api.errorhandler(InvalidPageRequest)
+def handle_invalid_page_request(e):
+    return jsonify({"error": str(e)}), 400
+
+@api.errorhandler(AuthError)
+def handle_auth_error(e):
+    return jsonify({"error": str(e)}), e.status_code
 
 # --- Auth Route ---
 @api.route('/auth', methods=['POST'])
 def authenticate():
-    data = request.json
-    tg_user = data.get('user')
-    referral_code = data.get('referral_code')
+    data = request.json or {}
+    bot_token = current_app.config['TELEGRAM_BOT_TOKEN']
+    if bot_token:
+        # initData is verified once per session here; later requests carry the token instead.
+        init_data = validate_init_data(data.get('init_data'), bot_token, current_app.config['TELEGRAM_INIT_DATA_MAX_AGE'])
+        if init_data is None:
+            return jsonify({"error": "Invalid Telegram init data"}), 401
+        tg_user = init_data.get('user')
+        referral_code = data.get('referral_code') or init_data.get('start_param')
+    else:
+        tg_user = data.get('user')
+        referral_code = data.get('referral_code')
 
     if not tg_user or not tg_user.get('id'):
         return jsonify({"error": "User data not provided"}), 400
     
     telegram_id = tg_user.get('id')
-    user = User.query.filter_by(telegram_id=telegram_id).first()
+    user_data = user_cache.get(telegram_id)
     is_new_user = False
+    if user_data is None:
+        user_data, is_new_user = find_or_create_user(telegram_id, tg_user, referral_code)
+        user_cache.put(telegram_id, user_data)
 
-    if not user:
-        is_new_user = True
-        referrer = None
-        if referral_code:
-            referrer = User.query.filter_by(referral_code=referral_code).first()
-        
-        user = User(
-            telegram_id=telegram_id, 
-            first_name=tg_user.get('first_name', 'N/A'), 
-            username=tg_user.get('username'),
-            referred_by_id=referrer.id if referrer else None,
-            referral_code=secrets.token_hex(5)
-        )
-        db.session.add(user)
-        db.session.commit()
-        
-    user_data = user.to_dict()
-    user_data['is_new_user'] = is_new_user
-    return jsonify(user_data)
+    token = issue_token(user_data['id'], user_data['is_admin'])
+    return jsonify({**user_data, "is_new_user": is_new_user, "token": token})
+
+def find_or_create_user(telegram_id, tg_user, referral_code):
+    """Returns (user dict, created) for the Telegram user, creating them on first launch."""
+    user, is_new_user = upsert_user(telegram_id, tg_user.get('first_name', 'N/A'), tg_user.get('username'), referral_code)
+    if is_new_user:
+        replica_router.mark_written(f"user:{user.id}")
+    return dict(user._mapping), is_new_user
 
 # --- Main User Routes ---
 @api.route('/packages', methods=['GET'])
+@read_only()
 def get_packages():
-    packages = Package.query.all()
-    return jsonify([p.to_dict() for p in packages])
+    # One snapshot, so the body and its ETag come from the same load.
+    catalog = package_catalog.get_snapshot()
+    cached = not_modified(catalog.etag)
+    if cached:
+        return cached
+    return with_etag(Response(catalog.payload, mimetype='application/json'), catalog.etag)
 
 @api.route('/user/packages', methods=['POST'])
 def purchase_package():
@@ -72,7 +135,16 @@ def purchase_package():
     except (ValueError, TypeError):
         return jsonify({"error": "Invalid investment amount"}), 400
 
-    package = Package.query.get_or_404(package_id)
+    try:
+        package_id = int(package_id)
+    except (ValueError, TypeError):
+        return jsonify({"error": "Invalid package ID"}), 400
+
+    check_user_access(user_id)
+
+    package = package_catalog.get_package(package_id)
+    if package is None:
+        abort(404)
     
     if investment_amount < package.min_price:
         return jsonify({"message": f"Investment must be at least ₦{package.min_price:,.0f}"}), 400
@@ -87,13 +159,16 @@ def purchase_package():
     )
     db.session.add(new_purchase)
     db.session.commit()
-    return jsonify({"message": "Package selected. Please make your payment.", "user_package_id": new_purchase.id, "package_name": new_purchase.package.name}), 201
+    replica_router.mark_written(f"user:{user_id}")
+    return jsonify({"message": "Package selected. Please make your payment.", "user_package_id": new_purchase.id, "package_name": package.name}), 201
 
 @api.route('/user/package/<int:user_package_id>', methods=['DELETE'])
 def cancel_package_selection(user_package_id):
     user_package = UserPackage.query.get_or_404(user_package_id)
+    check_user_access(user_package.user_id)
     if user_package.status == 'pending' and user_package.payment_proof_url is None and user_package.depositor_name is None:
         db.session.delete(user_package)
+        replica_router.mark_written(f"user:{user_package.user_id}")
         db.session.commit()
         return jsonify({"message": "Selection cancelled successfully."}), 200
     return jsonify({"error": "Cannot cancel this package. It may have already been processed or paid for."}), 400
@@ -104,11 +179,27 @@ def upload_payment_proof(user_package_id):
         return jsonify({"error": "No proof file provided"}), 400
     file = request.files['proof']
     user_package = UserPackage.query.get_or_404(user_package_id)
+    check_user_access(user_package.user_id)
+    if user_package.status not in ('pending', 'proof_processing'):
+        return jsonify({"error": "Payment proof can only be submitted for packages awaiting payment."}), 400
     try:
-        upload_result = cloudinary.uploader.upload(file, folder="payment_proofs")
-        user_package.payment_proof_url = upload_result['secure_url']
+        # Only spool to disk here; the upload itself runs on the proof_uploads worker pool.
+        spool_path, proof_hash = proof_uploads.spool(file, user_package.id)
         user_package.payment_method = 'crypto'
-        db.session.commit()
+        user_package.payment_proof_hash = proof_hash
+        known_proof = PaymentProof.query.filter_by(sha256=proof_hash).first()
+        if known_proof:
+            # Exact re-upload of a file we already stored: reuse it, skip the upload.
+            proof_uploads.discard(spool_path)
+            user_package.payment_proof_url = known_proof.secure_url
+            user_package.status = 'pending'
+            replica_router.mark_written(f"user:{user_package.user_id}")
+            db.session.commit()
+        else:
+            user_package.status = 'proof_processing'
+            replica_router.mark_written(f"user:{user_package.user_id}")
+            db.session.commit()
+            proof_uploads.submit(user_package.id, spool_path, proof_hash)
         return jsonify({"message": "Payment proof submitted. Awaiting admin confirmation."})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -117,39 +208,75 @@ def upload_payment_proof(user_package_id):
 def submit_bank_details(user_package_id):
     data = request.json
     user_package = UserPackage.query.get_or_404(user_package_id)
+    check_user_access(user_package.user_id)
     user_package.depositor_name = data.get('depositor_name')
     user_package.depositor_bank = data.get('depositor_bank')
     user_package.deposited_amount = data.get('deposited_amount')
     user_package.payment_method = 'bank_transfer'
+    replica_router.mark_written(f"user:{user_package.user_id}")
     db.session.commit()
     return jsonify({"message": "Payment details submitted. Awaiting admin confirmation."})
 
 @api.route('/user/<int:user_id>/dashboard', methods=['GET'])
+@user_required
+@read_only('user:{user_id}')
 def get_user_dashboard(user_id):
-    user_packages = UserPackage.query.filter_by(user_id=user_id).order_by(UserPackage.purchase_date.desc()).all()
-    return jsonify([up.to_dict() for up in user_packages])
+    etag = user_packages_etag(user_id)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    user_packages, next_cursor = paginate(user_packages_query(user_id), UserPackage.purchase_date, UserPackage.id, descending=True)
+    return with_etag(page_response(USER_PACKAGE_ROW_FIELDS.many(user_packages), next_cursor), etag)
 
 @api.route('/user/<int:user_id>/history', methods=['GET'])
+@user_required
+@read_only('user:{user_id}')
 def get_user_history(user_id):
-    user_packages = UserPackage.query.filter_by(user_id=user_id).order_by(UserPackage.purchase_date.desc()).all()
-    return jsonify([up.to_dict() for up in user_packages])
+    etag = user_packages_etag(user_id)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    user_packages, next_cursor = paginate(user_packages_query(user_id), UserPackage.purchase_date, UserPackage.id, descending=True)
+    return with_etag(page_response(USER_PACKAGE_ROW_FIELDS.many(user_packages), next_cursor), etag)
+
+@api.route('/user/<int:user_id>/summary', methods=['GET'])
+@user_required
+@read_only('user:{user_id}')
+def get_user_summary(user_id):
+    """Portfolio totals for the landing screen, computed in one aggregate query over the user's packages."""
+    now = datetime.utcnow()
+    active = UserPackage.status == 'paid'
+    approved = UserPackage.status.in_(['paid', 'expired', 'withdrawn'])
+    summary = db.session.query(
+        func.coalesce(func.sum(case((approved, UserPackage.investment_amount), else_=0)), 0).label('invested'),
+        func.coalesce(func.sum(UserPackage.total_withdrawn), 0).label('withdrawn'),
+        func.coalesce(func.sum(case((active, UserPackage.investment_amount * Package.dividend_percentage / 100), else_=0)), 0).label('projected_dividend'),
+        func.min(case((active & (UserPackage.expiry_date > now), UserPackage.expiry_date))).label('next_maturity'),
+        func.count(case((active, UserPackage.id))).label('active_packages'),
+        func.count(case((UserPackage.status.in_(['pending', 'proof_processing']), UserPackage.id))).label('pending_packages'),
+    ).join(Package, UserPackage.package_id == Package.id).filter(UserPackage.user_id == user_id).one()
+
+    return jsonify({
+        "invested": summary.invested,
+        "withdrawn": summary.withdrawn,
+        "projected_dividend": summary.projected_dividend,
+        "next_maturity": summary.next_maturity.isoformat() if summary.next_maturity else None,
+        "active_packages": summary.active_packages,
+        "pending_packages": summary.pending_packages
+    })
 
 @api.route('/user/<int:user_id>/referrals', methods=['GET'])
+@user_required
+@read_only('user:{user_id}')
 def get_user_referrals(user_id):
     user = User.query.get_or_404(user_id)
-    referrals = user.referrals.all()
+    referrals = db.session.query(User.id, User.first_name).filter_by(referred_by_id=user_id).all()
     referral_list = [{"id": r.id, "first_name": r.first_name} for r in referrals]
-    
-    commission = 0
-    for r in referrals:
-        first_paid_package = UserPackage.query.filter_by(user_id=r.id, status='paid').order_by(UserPackage.activation_date.asc()).first()
-        if first_paid_package:
-            commission += first_paid_package.investment_amount * 0.02
 
     return jsonify({
         "referral_code": user.referral_code,
         "referrals": referral_list,
-        "commission_earned": commission
+        "commission_earned": user.commission_earned
     })
 
 @api.route('/user/withdrawals', methods=['POST'])
@@ -157,6 +284,7 @@ def request_withdrawal():
     data = request.json
     user_package_id = data.get('user_package_id')
     user_package = UserPackage.query.get_or_404(user_package_id)
+    check_user_access(user_package.user_id)
 
     if user_package.status != 'paid' or not user_package.expiry_date or user_package.expiry_date > datetime.utcnow():
         return jsonify({"error": "Withdrawal is not yet available for this package."}), 400
@@ -181,52 +309,255 @@ def request_withdrawal():
     new_withdrawal = WithdrawalRequest(**withdrawal_data)
     user_package.status = 'expired' # Mark as pending withdrawal
     db.session.add(new_withdrawal)
+    replica_router.mark_written(f"user:{user_package.user_id}")
     db.session.commit()
     return jsonify({"message": "Withdrawal will be processed within 0-5 working days."}), 201
 
 # --- Admin Routes ---
+@api.route('/admin/packages', methods=['POST'])
+@verified_admin_required
+def create_package():
+    try:
+        data = request.form
+        if 'image' not in request.files:
+            return jsonify({"error": "No image file provided"}), 400
+
+        file = request.files['image']
+
+        required_fields = ['name', 'min_price', 'min_price_usd', 'duration_days', 'dividend_percentage']
+        if not all(field in data for field in required_fields):
+            return jsonify({"error": "Missing required form data"}), 400
+
+        # Downscale before uploading; the storage backend is Cloudinary in production.
+        with tempfile.TemporaryDirectory() as tmp:
+            src_path = os.path.join(tmp, 'image')
+            file.save(src_path)
+            image_url = proof_uploads.storage.upload(image_processor.process(src_path), "package_images")
+
+        new_package = Package(
+            name=data['name'],
+            min_price=float(data['min_price']),
+            max_price=float(data['max_price']) if data.get('max_price') else None,
+            min_price_usd=float(data['min_price_usd']),
+            max_price_usd=float(data['max_price_usd']) if data.get('max_price_usd') else None,
+            duration_days=int(data['duration_days']),
+            dividend_percentage=float(data['dividend_percentage']),
+            image_url=image_url
+        )
+        db.session.add(new_package)
+        db.session.commit()
+        package_catalog.invalidate()
+        return jsonify(new_package.to_dict()), 201
+    except Exception as e:
+        logging.error(f"Error creating package: {e}", exc_info=True)
+        return jsonify({"error": "An internal server error occurred."}), 500
+
 @api.route('/admin/pending', methods=['GET'])
+@admin_required
+@read_only('admin')
 def get_pending_packages():
-    pending_packages = UserPackage.query.filter_by(status='pending').filter(
-        (UserPackage.payment_proof_url != None) | (UserPackage.depositor_name != None)
-    ).order_by(UserPackage.purchase_date.asc()).all()
+    pending_packages, next_cursor = paginate(pending_packages_query(), UserPackage.purchase_date, UserPackage.id)
+
+    # Flag proofs whose file was also submitted for another package.
+    proof_hashes = {up.payment_proof_hash for up in pending_packages if up.payment_proof_hash}
+    packages_by_hash = {}
+    if proof_hashes:
+        for proof_hash, other_id in db.session.query(UserPackage.payment_proof_hash, UserPackage.id)\
+                .filter(UserPackage.payment_proof_hash.in_(proof_hashes)):
+            packages_by_hash.setdefault(proof_hash, []).append(other_id)
     
     result = []
     for up in pending_packages:
-        details = up.user.to_dict()
-        details.update(up.to_dict())
-        details['package_name'] = up.package.name
+        details = PENDING_PACKAGE_ROW_FIELDS.one(up)
         if up.payment_method == 'crypto':
             details["payment_proof_url"] = up.payment_proof_url
+            details["duplicate_proof_package_ids"] = [
+                other_id for other_id in packages_by_hash.get(up.payment_proof_hash, []) if other_id != up.id
+            ]
         elif up.payment_method == 'bank_transfer':
             details.update({"depositor_name": up.depositor_name, "depositor_bank": up.depositor_bank, "deposited_amount": up.deposited_amount})
         result.append(details)
         
-    return jsonify(result)
+    return page_response(result, next_cursor)
 
 @api.route('/admin/approve/<int:user_package_id>', methods=['POST'])
+@admin_required
 def approve_payment(user_package_id):
     package = UserPackage.query.get_or_404(user_package_id)
+    first_activation = package.first_activation_date is None
     package.status = 'paid'
+    package.is_matured = False
     package.activation_date = datetime.utcnow()
     package.expiry_date = calculate_expiry_date(package.activation_date, package.package.duration_days)
+    if first_activation:
+        package.first_activation_date = package.activation_date
+        credit_referral_commissions([package])
     db.session.commit()
+    replica_router.mark_written('admin')
     return jsonify({"message": "Package approved and activated."})
 
+@api.route('/admin/approve/batch', methods=['POST'])
+@admin_required
+def approve_payments():
+    user_package_ids = get_batch_ids(request.get_json(silent=True), 'user_package_ids')
+    if user_package_ids is None:
+        return jsonify({"error": f"user_package_ids must be a list of 1 to {MAX_BATCH_SIZE} ids"}), 400
+
+    locked = {up.id: up for up in lock_pending_candidates(user_package_ids)}
+    to_approve = [up for up in locked.values() if up.status == 'pending']
+    first_activations = [up for up in to_approve if up.first_activation_date is None]
+
+    now = datetime.utcnow()
+    expiry_dates = get_calendar().add_business_days_many([now] * len(to_approve), [up.package.duration_days for up in to_approve])
+    for up, expiry_date in zip(to_approve, expiry_dates):
+        up.status = 'paid'
+        up.is_matured = False
+        up.activation_date = now
+        up.expiry_date = expiry_date
+    for up in first_activations:
+        up.first_activation_date = now
+    credit_referral_commissions(first_activations)
+    db.session.commit()
+    replica_router.mark_written('admin')
+
+    results = []
+    for user_package_id in user_package_ids:
+        up = locked.get(user_package_id)
+        if up is None:
+            results.append({"user_package_id": user_package_id, "error": "Package not found or being processed by another admin"})
+        elif up not in to_approve:
+            results.append({"user_package_id": user_package_id, "error": "Package is not in a 'pending' state"})
+        else:
+            results.append({"user_package_id": user_package_id, "status": "paid"})
+    return jsonify({"results": results})
+
+@api.route('/admin/reject/batch', methods=['POST'])
+@admin_required
+def reject_payments():
+    data = request.get_json(silent=True) or {}
+    user_package_ids = get_batch_ids(data, 'user_package_ids')
+    if user_package_ids is None:
+        return jsonify({"error": f"user_package_ids must be a list of 1 to {MAX_BATCH_SIZE} ids"}), 400
+    reason = data.get('reason', 'No reason provided.')
+
+    locked = {up.id: up for up in lock_pending_candidates(user_package_ids)}
+    results = []
+    for user_package_id in user_package_ids:
+        up = locked.get(user_package_id)
+        if up is None:
+            results.append({"user_package_id": user_package_id, "error": "Package not found or being processed by another admin"})
+        elif up.status != 'pending':
+            results.append({"user_package_id": user_package_id, "error": "Package is not in a 'pending' state"})
+        else:
+            up.status = 'rejected'
+            up.rejection_reason = reason
+            results.append({"user_package_id": user_package_id, "status": "rejected"})
+    db.session.commit()
+    replica_router.mark_written('admin')
+    return jsonify({"results": results})
+
 @api.route('/admin/reject/<int:user_package_id>', methods=['POST'])
+@admin_required
 def reject_payment(user_package_id):
     package = UserPackage.query.get_or_404(user_package_id)
     package.status = 'rejected'
     package.rejection_reason = request.json.get('reason', 'No reason provided.')
     db.session.commit()
+    replica_router.mark_written('admin')
     return jsonify({"message": "Package rejected."})
 
 @api.route('/admin/withdrawals', methods=['GET'])
+@admin_required
+@read_only('admin')
 def get_pending_withdrawals():
-    withdrawals = WithdrawalRequest.query.filter_by(status='pending').order_by(WithdrawalRequest.request_date.asc()).all()
-    return jsonify([w.to_dict() for w in withdrawals])
+    query = WithdrawalRequest.query.options(
+        joinedload(WithdrawalRequest.user),
+        joinedload(WithdrawalRequest.user_package).joinedload(UserPackage.package)
+    ).filter_by(status='pending')
+    withdrawals, next_cursor = paginate(query, WithdrawalRequest.request_date, WithdrawalRequest.id)
+    return page_response([w.to_dict() for w in withdrawals], next_cursor)
+
+@api.route('/admin/withdrawals/approve/batch', methods=['POST'])
+@admin_required
+def approve_withdrawals():
+    withdrawal_ids = get_batch_ids(request.get_json(silent=True), 'withdrawal_ids')
+    if withdrawal_ids is None:
+        return jsonify({"error": f"withdrawal_ids must be a list of 1 to {MAX_BATCH_SIZE} ids"}), 400
+
+    # Lock each withdrawal together with its package; rows another admin holds are skipped.
+    rows = db.session.query(
+        WithdrawalRequest.id.label('withdrawal_id'),
+        WithdrawalRequest.status,
+        WithdrawalRequest.amount,
+        UserPackage.id.label('user_package_id'),
+        UserPackage.total_withdrawn,
+        UserPackage.investment_amount,
+        Package.duration_days
+    ).join(UserPackage, UserPackage.id == WithdrawalRequest.user_package_id)\
+        .join(Package, Package.id == UserPackage.package_id)\
+        .filter(WithdrawalRequest.id.in_(withdrawal_ids))\
+        .with_for_update(skip_locked=True, of=[WithdrawalRequest, UserPackage]).all()
+    locked = {row.withdrawal_id: row for row in rows}
+
+    outcomes = {}
+    closing = []
+    renewing = {}  # duration_days -> rows
+    for row in rows:
+        if row.status != 'pending':
+            continue
+        if row.total_withdrawn + row.amount >= row.investment_amount:
+            closing.append(row)
+            outcomes[row.withdrawal_id] = 'withdrawn'
+        else:
+            renewing.setdefault(row.duration_days, []).append(row)
+            outcomes[row.withdrawal_id] = 'renewed'
+
+    def withdrawn_increment(group):
+        return UserPackage.total_withdrawn + case({row.user_package_id: row.amount for row in group}, value=UserPackage.id)
+
+    now = datetime.utcnow()
+    if closing:
+        db.session.execute(
+            update(UserPackage)
+            .where(UserPackage.id.in_([row.user_package_id for row in closing]))
+            .values(total_withdrawn=withdrawn_increment(closing), status='withdrawn')
+            .execution_options(synchronize_session=False)
+        )
+    # Every package renewed in this batch with the same duration gets the same expiry date.
+    for duration_days, group in renewing.items():
+        db.session.execute(
+            update(UserPackage)
+            .where(UserPackage.id.in_([row.user_package_id for row in group]))
+            .values(
+                total_withdrawn=withdrawn_increment(group),
+                status='paid',
+                is_matured=False,
+                activation_date=now,
+                expiry_date=calculate_expiry_date(now, duration_days)
+            )
+            .execution_options(synchronize_session=False)
+        )
+    if outcomes:
+        db.session.execute(
+            delete(WithdrawalRequest)
+            .where(WithdrawalRequest.id.in_(list(outcomes)))
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+    replica_router.mark_written('admin')
+
+    results = []
+    for withdrawal_id in withdrawal_ids:
+        if withdrawal_id in outcomes:
+            results.append({"withdrawal_id": withdrawal_id, "status": outcomes[withdrawal_id]})
+        elif withdrawal_id in locked:
+            results.append({"withdrawal_id": withdrawal_id, "error": "This withdrawal request is not pending."})
+        else:
+            results.append({"withdrawal_id": withdrawal_id, "error": "Withdrawal not found or being processed by another admin"})
+    return jsonify({"results": results})
 
 @api.route('/admin/withdrawals/<int:withdrawal_id>/approve', methods=['POST'])
+@admin_required
 def approve_withdrawal(withdrawal_id):
     withdrawal = WithdrawalRequest.query.get_or_404(withdrawal_id)
     user_package = withdrawal.user_package
@@ -237,25 +568,30 @@ def approve_withdrawal(withdrawal_id):
         user_package.status = 'withdrawn' # Cycle is complete
     else:
         user_package.status = 'paid' # Renew for another cycle
+        user_package.is_matured = False
         user_package.activation_date = datetime.utcnow()
         user_package.expiry_date = calculate_expiry_date(user_package.activation_date, user_package.package.duration_days)
     
     db.session.delete(withdrawal) # Delete the processed request
     db.session.commit()
+    replica_router.mark_written('admin')
     return jsonify({"message": "Withdrawal approved and package renewed."})
 
 @api.route('/admin/history', methods=['GET'])
+@admin_required
+@read_only('admin')
 def get_admin_history():
-    history = UserPackage.query.filter(UserPackage.status.in_(['paid', 'rejected', 'expired', 'withdrawn'])).order_by(UserPackage.purchase_date.desc()).all()
-    result = []
-    for up in history:
-        item = {
-            "user_package_id": up.id, 
-            "user_name": up.user.first_name, 
-            "package_name": up.package.name, 
-            "status": up.status, 
-            "date": (up.activation_date or up.purchase_date).isoformat(), 
-            "reason": up.rejection_reason
-        }
-        result.append(item)
-    return jsonify(result)
\ No newline at end of file
+    history, next_cursor = paginate(admin_history_query(), UserPackage.purchase_date, UserPackage.id, descending=True)
+    return page_response(ADMIN_HISTORY_ROW_FIELDS.many(history), next_cursor)
+
+@api.route('/admin/db/pool', methods=['GET'])
+@verified_admin_required
+def get_db_pool_stats():
+    return jsonify({name or "default": pool_stats(engine) for name, engine in db.engines.items()})
+
+@api.route('/metrics', methods=['GET'])
+@verified_admin_required
+def get_metrics():
+    if not request_metrics.enabled:
+        abort(404)
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
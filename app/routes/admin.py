@@ -1,21 +1,17 @@
 from flask import request, jsonify, Blueprint
-from datetime import datetime, timedelta
+from datetime import datetime
 from ..models import Package, UserPackage, WithdrawalRequest
 from ..extensions import db
+from ..cache import package_catalog
+from ..business_days import calculate_expiry_date
+from ..images import image_processor
 import cloudinary.uploader
 import logging
+import os
+import tempfile
 
 admin_bp = Blueprint('admin_bp', __name__, url_prefix='/admin')
 
-def calculate_expiry_date(start_date, working_days):
-    current_date = start_date
-    days_added = 0
-    while days_added < working_days:
-        current_date += timedelta(days=1)
-        if current_date.weekday() < 5:
-            days_added += 1
-    return current_date
-
 @admin_bp.route('/packages', methods=['POST'])
 def create_package():
     try:
@@ -29,7 +25,10 @@ def create_package():
         if not all(field in data for field in required_fields):
             return jsonify({"error": "Missing required form data"}), 400
 
-        upload_result = cloudinary.uploader.upload(file, folder="package_images")
+        with tempfile.TemporaryDirectory() as tmp:
+            src_path = os.path.join(tmp, 'image')
+            file.save(src_path)
+            upload_result = cloudinary.uploader.upload(image_processor.process(src_path), folder="package_images")
         
         new_package = Package(
             name=data['name'], 
@@ -43,6 +42,7 @@ def create_package():
         )
         db.session.add(new_package)
         db.session.commit()
+        package_catalog.invalidate()
         return jsonify(new_package.to_dict()), 201
     except Exception as e:
         logging.error(f"Error creating package: {e}", exc_info=True)
@@ -1,5 +1,6 @@
 from .extensions import db
 from .models import Package
+from .cache import package_catalog
 
 def seed_packages():
     """Seeds the database with the three default investment packages."""
@@ -49,4 +50,5 @@ def seed_packages():
 
 
     db.session.commit()
+    package_catalog.invalidate()
     print("Database seeding/update complete.")
\ No newline at end of file
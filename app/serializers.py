@@ -0,0 +1,102 @@
+from operator import attrgetter
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the stdlib encoder
+    orjson = None
+
+def isoformat(value):
+    return value.isoformat()
+
+class Fields:
+    """
+    A precompiled field spec: output keys paired with the attribute each is read
+    from, e.g. ('package_name', 'package.name'), optionally with a converter
+    such as isoformat (skipped for None). A bare string uses the same name for
+    both. Works on ORM objects and on query rows alike, since both expose
+    their values as attributes; one attrgetter fetches them all in a single call.
+    """
+
+    def __init__(self, *fields):
+        fields = [(field, field) if isinstance(field, str) else field for field in fields]
+        self.keys = tuple(field[0] for field in fields)
+        getter = attrgetter(*(field[1] for field in fields))
+        self._get = getter if len(fields) > 1 else lambda obj: (getter(obj),)
+        self._converters = tuple((i, field[2]) for i, field in enumerate(fields) if len(field) > 2)
+
+    def __add__(self, other):
+        combined = Fields.__new__(Fields)
+        combined.keys = self.keys + other.keys
+        first, second, split = self._get, other._get, len(self.keys)
+        combined._get = lambda obj: first(obj) + second(obj)
+        combined._converters = self._converters + tuple((i + split, convert) for i, convert in other._converters)
+        return combined
+
+    def one(self, obj):
+        values = self._get(obj)
+        if self._converters:
+            values = list(values)
+            for i, convert in self._converters:
+                if values[i] is not None:
+                    values[i] = convert(values[i])
+        return dict(zip(self.keys, values))
+
+    def many(self, objs):
+        return [self.one(obj) for obj in objs]
+
+USER_FIELDS = Fields('id', 'telegram_id', 'first_name', 'is_admin', 'referral_code')
+
+PACKAGE_FIELDS = Fields(
+    'id', 'name', 'min_price', 'max_price', 'min_price_usd', 'max_price_usd',
+    'duration_days', 'dividend_percentage', 'image_url'
+)
+
+USER_PACKAGE_FIELDS = Fields(
+    ('user_package_id', 'id'),
+    ('package_name', 'package.name'),
+    'investment_amount',
+    'total_withdrawn',
+    ('package_dividend_percentage', 'package.dividend_percentage'),
+    'status',
+    ('purchase_date', 'purchase_date', isoformat),
+    ('activation_date', 'activation_date', isoformat),
+    ('expiry_date', 'expiry_date', isoformat),
+    'is_matured',
+    'rejection_reason',
+    'payment_method',
+)
+
+WITHDRAWAL_FIELDS = Fields(
+    ('withdrawal_id', 'id'),
+    ('user_name', 'user.first_name'),
+    ('package_name', 'user_package.package.name'),
+    'amount',
+    'status',
+    ('request_date', 'request_date', isoformat),
+    'withdrawal_method',
+)
+WITHDRAWAL_METHOD_FIELDS = {
+    'bank_transfer': Fields('account_name', 'account_number', 'bank_name'),
+    'crypto': Fields('wallet_address', 'crypto_network'),
+}
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson. Datetimes and anything else orjson
+    doesn't encode natively go through Flask's default(), so responses look
+    the same as with the stdlib encoder.
+    """
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+JSONProvider = OrjsonProvider if orjson is not None else DefaultJSONProvider
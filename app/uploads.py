@@ -0,0 +1,171 @@
+import atexit
+import hashlib
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import cloudinary.uploader
+from .extensions import db
+from .models import UserPackage, PaymentProof
+from sqlalchemy.exc import IntegrityError
+from .images import image_processor
+
+class CloudinaryStorage:
+    def upload(self, path, folder):
+        return cloudinary.uploader.upload(path, folder=folder)['secure_url']
+
+class LocalStorage:
+    """Copies files under a local directory. Stands in for Cloudinary in development and tests."""
+
+    def __init__(self, root, base_url):
+        self.root = root
+        self.base_url = base_url.rstrip('/')
+
+    def upload(self, path, folder):
+        name = os.path.basename(path)
+        os.makedirs(os.path.join(self.root, folder), exist_ok=True)
+        shutil.copyfile(path, os.path.join(self.root, folder, name))
+        return f"{self.base_url}/{folder}/{name}"
+
+STORAGE_BACKENDS = {
+    'cloudinary': lambda config: CloudinaryStorage(),
+    'local': lambda config: LocalStorage(config['LOCAL_STORAGE_DIR'], config['LOCAL_STORAGE_URL']),
+}
+
+class ProofUploadPipeline:
+    """
+    Moves payment-proof uploads off the request thread. The request spools the
+    file to local disk and marks the package 'proof_processing'; a worker pool
+    downscales it and uploads it to the storage backend, retrying with backoff,
+    then records the URL and returns the package to 'pending' for admin review.
+
+    With UPLOAD_WORKERS = 0 uploads run inline, which keeps tests deterministic.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.storage = None
+        self._executor = None
+
+    def init_app(self, app):
+        self.app = app
+        self.storage = STORAGE_BACKENDS[app.config['PROOF_STORAGE_BACKEND']](app.config)
+        self.spool_dir = app.config['UPLOAD_SPOOL_DIR']
+        os.makedirs(self.spool_dir, exist_ok=True)
+        if app.config['UPLOAD_WORKERS'] > 0:
+            self._executor = ThreadPoolExecutor(max_workers=app.config['UPLOAD_WORKERS'], thread_name_prefix='proof-upload')
+            # Let queued uploads finish before the process exits.
+            atexit.register(self._executor.shutdown, wait=True)
+        app.extensions['proof_uploads'] = self
+
+    def spool(self, file, user_package_id, chunk_size=64 * 1024):
+        """
+        Writes the upload to the spool directory, hashing it on the way. Returns
+        (path, sha256 hex). The file is named <user_package_id>.<sha256>.<uuid>
+        so recover() can find it again from the package row.
+        """
+        partial = os.path.join(self.spool_dir, f"{uuid.uuid4().hex}.part")
+        digest = hashlib.sha256()
+        with open(partial, 'wb') as out:
+            for chunk in iter(lambda: file.stream.read(chunk_size), b''):
+                digest.update(chunk)
+                out.write(chunk)
+        proof_hash = digest.hexdigest()
+        path = os.path.join(self.spool_dir, f"{user_package_id}.{proof_hash}.{uuid.uuid4().hex}")
+        os.replace(partial, path)
+        return path, proof_hash
+
+    def _spooled_file(self, user_package_id, proof_hash):
+        """The newest spool file for this package and proof, or None."""
+        prefix = f"{user_package_id}.{proof_hash}."
+        candidates = [os.path.join(self.spool_dir, name) for name in os.listdir(self.spool_dir) if name.startswith(prefix)]
+        return max(candidates, key=os.path.getmtime, default=None)
+
+    def recover(self, older_than=timedelta(minutes=10)):
+        """
+        Picks up packages left in 'proof_processing' by a process that exited
+        before its upload finished. A package whose spool file survived is
+        queued again; one without goes back to 'pending' so the user can
+        resubmit. Only rows untouched for `older_than` are considered, so
+        uploads still running elsewhere are left alone.
+
+        Returns (requeued, reset).
+        """
+        cutoff = datetime.utcnow() - older_than
+        stale = db.session.query(UserPackage.id, UserPackage.payment_proof_hash)\
+            .filter(UserPackage.status == 'proof_processing', UserPackage.updated_at < cutoff)\
+            .order_by(UserPackage.id).all()
+        requeue, reset = [], []
+        for user_package_id, proof_hash in stale:
+            path = self._spooled_file(user_package_id, proof_hash) if proof_hash else None
+            if path:
+                requeue.append((user_package_id, path, proof_hash))
+            else:
+                reset.append(user_package_id)
+        if reset:
+            db.session.query(UserPackage)\
+                .filter(UserPackage.id.in_(reset), UserPackage.status == 'proof_processing')\
+                .update({UserPackage.status: 'pending'}, synchronize_session=False)
+            db.session.commit()
+        for user_package_id, path, proof_hash in requeue:
+            self.submit(user_package_id, path, proof_hash)
+        return len(requeue), len(reset)
+
+    def discard(self, path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    def submit(self, user_package_id, path, proof_hash, folder="payment_proofs"):
+        if self._executor is None:
+            self._process(user_package_id, path, proof_hash, folder)
+        else:
+            self._executor.submit(self._process, user_package_id, path, proof_hash, folder)
+
+    def _remember(self, proof_hash, url):
+        try:
+            db.session.add(PaymentProof(sha256=proof_hash, secure_url=url))
+            db.session.commit()
+        except IntegrityError:
+            # The same file finished uploading for another package first.
+            db.session.rollback()
+
+    def _upload_with_retries(self, path, folder):
+        retries = self.app.config['UPLOAD_MAX_RETRIES']
+        for attempt in range(retries + 1):
+            try:
+                return self.storage.upload(path, folder)
+            except Exception as e:
+                logging.warning(f"Proof upload attempt {attempt + 1} failed: {e}")
+                if attempt < retries:
+                    time.sleep(self.app.config['UPLOAD_RETRY_BACKOFF'] * 2 ** attempt)
+        return None
+
+    def _process(self, user_package_id, path, proof_hash, folder):
+        with self.app.app_context():
+            upload_path = path
+            try:
+                upload_path = image_processor.process(path)
+                url = self._upload_with_retries(upload_path, folder)
+                if url:
+                    self._remember(proof_hash, url)
+                user_package = db.session.get(UserPackage, user_package_id)
+                if user_package is None or user_package.status not in ('proof_processing', 'pending'):
+                    return
+                if url:
+                    user_package.payment_proof_url = url
+                else:
+                    logging.error(f"Giving up on payment proof upload for package {user_package_id}")
+                # On failure the package goes back to 'pending' without a proof so the user can resubmit.
+                user_package.status = 'pending'
+                db.session.commit()
+            except Exception as e:
+                logging.error(f"Error processing payment proof for package {user_package_id}: {e}", exc_info=True)
+                db.session.rollback()
+            finally:
+                for spooled in {path, upload_path}:
+                    self.discard(spooled)
+
+proof_uploads = ProofUploadPipeline()
@@ -0,0 +1,65 @@
+import secrets
+from sqlalchemy import select, literal, true
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from .extensions import db
+from .models import User
+
+REFERRAL_CODE_ATTEMPTS = 3
+
+def _insert_ignoring_conflicts(dialect_name, columns, source):
+    """INSERT ... SELECT that silently skips rows hitting any unique key (telegram_id or referral_code)."""
+    if dialect_name == 'mysql':
+        stmt = mysql.insert(User).from_select(columns, source)
+        return stmt.on_duplicate_key_update(id=stmt.table.c.id)
+    if dialect_name == 'postgresql':
+        return postgresql.insert(User).from_select(columns, source).on_conflict_do_nothing()
+    return sqlite.insert(User).from_select(columns, source).on_conflict_do_nothing()
+
+def _find_user(telegram_id, locking=False):
+    query = db.session.query(User.id, User.telegram_id, User.first_name, User.is_admin, User.referral_code)\
+        .filter_by(telegram_id=telegram_id)
+    if locking:
+        # A locking read sees the latest committed row rather than the snapshot
+        # the transaction's earlier reads opened (MySQL's REPEATABLE READ), so a
+        # row another launch committed meanwhile is found.
+        query = query.with_for_update(read=True)
+    return query.first()
+
+def upsert_user(telegram_id, first_name, username=None, referral_code=None):
+    """
+    Creates the user for telegram_id unless one already exists, resolving the
+    referrer from referral_code inside the same INSERT, and returns (user row, created).
+
+    Returning users are answered by a plain lookup on the telegram_id index;
+    only a miss runs the INSERT, which on MySQL would otherwise take locks,
+    write to the binlog and burn an auto-increment value every time.
+    Concurrent first launches both run the INSERT; the loser's row is skipped
+    by the unique key instead of raising. If the generated referral code is
+    already taken the INSERT is skipped too, and a fresh code is tried.
+    """
+    user = _find_user(telegram_id)
+    if user is not None:
+        return user, False
+
+    referrer = aliased(User, name='referrer')
+    one = select(literal(1).label('one')).subquery('one')
+    columns = ['telegram_id', 'first_name', 'username', 'is_admin', 'referral_code', 'referred_by_id']
+
+    for _ in range(REFERRAL_CODE_ATTEMPTS):
+        new_code = secrets.token_hex(5)
+        # LEFT JOIN against a one-row table so the INSERT happens with or without a referrer.
+        # SQLite needs the WHERE to tell the upsert's ON CONFLICT apart from a join's ON.
+        source = select(
+            literal(telegram_id), literal(first_name), literal(username), literal(False),
+            literal(new_code), referrer.id
+        ).select_from(one.outerjoin(referrer, referrer.referral_code == referral_code)).where(true())
+        db.session.execute(_insert_ignoring_conflicts(db.engine.dialect.name, columns, source))
+
+        user = _find_user(telegram_id, locking=True)
+        if user is not None:
+            db.session.commit()
+            return user, user.referral_code == new_code
+
+    db.session.rollback()
+    raise RuntimeError(f"Could not generate a unique referral code for Telegram user {telegram_id}")
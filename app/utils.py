@@ -1,20 +1,13 @@
 from flask_mail import Message
-from .extensions import mail
 from flask import current_app
-import threading
+from .mailer import mail_dispatcher
 import cloudinary
 import os
 
-def send_async_email(app, msg):
-    with app.app_context():
-        mail.send(msg)
-
 def send_email(to, subject, template):
     app = current_app._get_current_object()
     msg = Message(subject, recipients=[to], html=template, sender=app.config['MAIL_DEFAULT_SENDER'])
-    thr = threading.Thread(target=send_async_email, args=[app, msg])
-    thr.start()
-    return thr
+    return mail_dispatcher.send(msg)
 
 def setup_cloudinary():
     cloudinary.config(
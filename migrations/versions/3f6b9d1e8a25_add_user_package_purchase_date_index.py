@@ -0,0 +1,26 @@
+"""Add (purchase_date, id) index for the admin history
+
+Revision ID: 3f6b9d1e8a25
+Revises: a2c8e5f0d371
+Create Date: 2026-10-17 18:20:11.402517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6b9d1e8a25'
+down_revision = 'a2c8e5f0d371'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_package', schema=None) as batch_op:
+        batch_op.create_index('ix_user_package_purchase_date_id', ['purchase_date', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_package', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_package_purchase_date_id')
@@ -0,0 +1,27 @@
+"""Add updated_at to user_package
+
+Revision ID: 5b9e2f7c1a64
+Revises: c41e7d9a5f02
+Create Date: 2026-10-17 11:26:08.117530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = '5b9e2f7c1a64'
+down_revision = 'c41e7d9a5f02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_package', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql'), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user_package', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,42 @@
+"""Add indexes for dashboard, admin queue and referral queries
+
+Revision ID: 8f3a1c6d2b47
+Revises: 2d668551b3cb
+Create Date: 2026-10-17 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f3a1c6d2b47'
+down_revision = '2d668551b3cb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_referred_by_id'), ['referred_by_id'], unique=False)
+
+    with op.batch_alter_table('user_package', schema=None) as batch_op:
+        batch_op.create_index('ix_user_package_user_id_purchase_date', ['user_id', 'purchase_date'], unique=False)
+        batch_op.create_index('ix_user_package_status_purchase_date', ['status', 'purchase_date'], unique=False)
+        batch_op.create_index('ix_user_package_user_id_status_activation_date', ['user_id', 'status', 'activation_date'], unique=False)
+
+    with op.batch_alter_table('withdrawal_request', schema=None) as batch_op:
+        batch_op.create_index('ix_withdrawal_request_status_request_date', ['status', 'request_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('withdrawal_request', schema=None) as batch_op:
+        batch_op.drop_index('ix_withdrawal_request_status_request_date')
+
+    with op.batch_alter_table('user_package', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_package_user_id_status_activation_date')
+        batch_op.drop_index('ix_user_package_status_purchase_date')
+        batch_op.drop_index('ix_user_package_user_id_purchase_date')
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_referred_by_id'))
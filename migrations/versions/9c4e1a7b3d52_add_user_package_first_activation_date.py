@@ -0,0 +1,31 @@
+"""Add first_activation_date to user_package
+
+Revision ID: 9c4e1a7b3d52
+Revises: 3f6b9d1e8a25
+Create Date: 2026-10-17 18:12:44.530218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e1a7b3d52'
+down_revision = '3f6b9d1e8a25'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_package', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('first_activation_date', sa.DateTime(), nullable=True))
+
+    # The first approval of a renewed package isn't recorded anywhere, so its
+    # latest activation stands in. Check the ledger afterwards with
+    # `flask rebuild-commissions --verify`.
+    op.execute("UPDATE user_package SET first_activation_date = activation_date WHERE activation_date IS NOT NULL")
+
+
+def downgrade():
+    with op.batch_alter_table('user_package', schema=None) as batch_op:
+        batch_op.drop_column('first_activation_date')
@@ -0,0 +1,30 @@
+"""Add is_matured flag to user_package
+
+Revision ID: a2c8e5f0d371
+Revises: e7d04b3f9c18
+Create Date: 2026-10-17 14:58:37.210946
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2c8e5f0d371'
+down_revision = 'e7d04b3f9c18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_package', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_matured', sa.Boolean(), server_default=sa.false(), nullable=False))
+        batch_op.create_index('ix_user_package_status_is_matured_expiry_date', ['status', 'is_matured', 'expiry_date'], unique=False)
+
+    # Existing matured packages are flagged by the first `flask sweep-matured` run.
+
+
+def downgrade():
+    with op.batch_alter_table('user_package', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_package_status_is_matured_expiry_date')
+        batch_op.drop_column('is_matured')
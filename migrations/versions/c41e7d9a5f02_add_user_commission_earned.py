@@ -0,0 +1,28 @@
+"""Add referral commission ledger column to user
+
+Revision ID: c41e7d9a5f02
+Revises: 8f3a1c6d2b47
+Create Date: 2026-10-17 10:03:55.902417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41e7d9a5f02'
+down_revision = '8f3a1c6d2b47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('commission_earned', sa.Float(), server_default='0', nullable=False))
+
+    # Existing totals are backfilled with `flask rebuild-commissions`.
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('commission_earned')
@@ -0,0 +1,26 @@
+"""Add version counter to user_package
+
+Revision ID: d8b3f6a2c917
+Revises: 9c4e1a7b3d52
+Create Date: 2026-10-17 19:04:21.118307
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8b3f6a2c917'
+down_revision = '9c4e1a7b3d52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_package', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('user_package', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,38 @@
+"""Add payment proof content hashes
+
+Revision ID: e7d04b3f9c18
+Revises: 5b9e2f7c1a64
+Create Date: 2026-10-17 13:41:22.604851
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7d04b3f9c18'
+down_revision = '5b9e2f7c1a64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('payment_proof',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('secure_url', sa.String(length=255), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sha256')
+    )
+    with op.batch_alter_table('user_package', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('payment_proof_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_user_package_payment_proof_hash'), ['payment_proof_hash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_package', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_package_payment_proof_hash'))
+        batch_op.drop_column('payment_proof_hash')
+
+    op.drop_table('payment_proof')
@@ -0,0 +1,101 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import User, Package, UserPackage, WithdrawalRequest
+from app.cache import package_catalog, user_cache
+
+def make_config(tmp_path, **overrides):
+    class TestConfig(Config):
+        TESTING = True
+        SECRET_KEY = 'test-secret'
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        SQLALCHEMY_BINDS = {}
+        PROOF_STORAGE_BACKEND = 'local'
+        LOCAL_STORAGE_DIR = str(tmp_path / 'storage')
+        UPLOAD_SPOOL_DIR = str(tmp_path / 'spool')
+        UPLOAD_WORKERS = 0
+        IMAGE_WORKERS = 0
+        MAIL_WORKERS = 0
+    for key, value in overrides.items():
+        setattr(TestConfig, key, value)
+    return TestConfig
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Builds an app on a fresh SQLite file; keyword arguments override config."""
+    def make(**overrides):
+        app = create_app(make_config(tmp_path, **overrides))
+        with app.app_context():
+            db.create_all(bind_key=None)
+        package_catalog.invalidate()
+        user_cache.clear()
+        return app
+    return make
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def count_statements():
+    """Context manager collecting every SQL statement executed inside it."""
+    @contextmanager
+    def counter():
+        statements = []
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(Engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, 'before_cursor_execute', record)
+    return counter
+
+@pytest.fixture
+def seed(app):
+    """
+    seed(n) adds n users, each with a pending package awaiting review, a paid
+    package with a pending withdrawal request, and a rejected package.
+    """
+    created = [0]
+
+    def add(n):
+        with app.app_context():
+            package = Package.query.first()
+            if package is None:
+                package = Package(name='Conservative', min_price=15000, max_price=5000000, min_price_usd=10,
+                                  max_price_usd=3400, duration_days=18, dividend_percentage=10)
+                db.session.add(package)
+                db.session.flush()
+            base = datetime(2025, 1, 1)
+            for _ in range(n):
+                i = created[0]
+                created[0] += 1
+                user = User(telegram_id=1000 + i, first_name=f'User {i}', referral_code=f'r{i:09d}')
+                db.session.add(user)
+                db.session.flush()
+                pending = UserPackage(user_id=user.id, package_id=package.id, investment_amount=20000, status='pending',
+                                      purchase_date=base + timedelta(minutes=i), payment_method='crypto',
+                                      payment_proof_url=f'https://example.invalid/{i}.webp', payment_proof_hash=f'{i:064x}')
+                paid = UserPackage(user_id=user.id, package_id=package.id, investment_amount=30000, status='expired',
+                                   purchase_date=base + timedelta(minutes=i, seconds=1), activation_date=base,
+                                   first_activation_date=base,
+                                   expiry_date=base + timedelta(days=25), payment_method='crypto')
+                rejected = UserPackage(user_id=user.id, package_id=package.id, investment_amount=40000, status='rejected',
+                                       purchase_date=base + timedelta(minutes=i, seconds=2), rejection_reason='No payment')
+                db.session.add_all([pending, paid, rejected])
+                db.session.flush()
+                db.session.add(WithdrawalRequest(user_id=user.id, user_package_id=paid.id, amount=3000,
+                                                 withdrawal_method='crypto', wallet_address='T1', crypto_network='TRC20'))
+            db.session.commit()
+    return add
@@ -0,0 +1,47 @@
+import io
+import os
+from PIL import Image
+from app.auth import issue_token
+
+PACKAGE_FORM = {'name': 'Growth', 'min_price': '50000', 'min_price_usd': '35',
+                'duration_days': '20', 'dividend_percentage': '12'}
+
+def png(size=(3000, 2000)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'navy').save(buffer, 'PNG')
+    buffer.seek(0)
+    return buffer
+
+def auth_header(app, is_admin):
+    with app.app_context():
+        return {'Authorization': f'Bearer {issue_token(1, is_admin)}'}
+
+def test_admin_creates_a_package_with_a_downscaled_image(app, client):
+    assert client.get('/api/packages').get_json() == []
+
+    response = client.post('/api/admin/packages', headers=auth_header(app, True),
+                           data={**PACKAGE_FORM, 'image': (png(), 'package.png')})
+    assert response.status_code == 201, response.get_json()
+    package = response.get_json()
+    assert package['name'] == 'Growth'
+
+    stored = os.path.join(app.config['LOCAL_STORAGE_DIR'], 'package_images', package['image_url'].rsplit('/', 1)[-1])
+    with Image.open(stored) as image:
+        assert max(image.size) <= app.config['IMAGE_MAX_DIMENSION']
+    # The catalog cache is invalidated, so the new package is listed straight away.
+    assert [p['name'] for p in client.get('/api/packages').get_json()] == ['Growth']
+
+def test_creating_a_package_needs_an_admin(app, client):
+    response = client.post('/api/admin/packages', headers=auth_header(app, False),
+                           data={**PACKAGE_FORM, 'image': (png((10, 10)), 'package.png')})
+    assert response.status_code == 403
+
+def test_creating_a_package_needs_a_token_even_with_auth_optional(app, client):
+    assert not app.config['AUTH_REQUIRED']
+    response = client.post('/api/admin/packages', data={**PACKAGE_FORM, 'image': (png((10, 10)), 'package.png')})
+    assert response.status_code == 401
+    assert client.get('/api/packages').get_json() == []
+
+def test_creating_a_package_needs_an_image(app, client):
+    response = client.post('/api/admin/packages', headers=auth_header(app, True), data=PACKAGE_FORM)
+    assert response.status_code == 400
@@ -0,0 +1,14 @@
+import pytest
+
+def test_startup_requires_a_secret_key(make_app):
+    with pytest.raises(RuntimeError, match='SECRET_KEY'):
+        make_app(SECRET_KEY=None)
+
+def test_startup_refuses_required_auth_without_a_bot_token(make_app):
+    with pytest.raises(RuntimeError, match='TELEGRAM_BOT_TOKEN'):
+        make_app(AUTH_REQUIRED=True, TELEGRAM_BOT_TOKEN=None)
+
+def test_required_auth_with_a_bot_token_starts(make_app):
+    app = make_app(AUTH_REQUIRED=True, TELEGRAM_BOT_TOKEN='123:abc')
+    response = app.test_client().get('/api/user/1/dashboard')
+    assert response.status_code == 401
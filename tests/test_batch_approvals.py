@@ -0,0 +1,84 @@
+from datetime import timedelta
+import pytest
+from app.business_days import calculate_expiry_date
+from app.extensions import db
+from app.models import User, UserPackage
+from app.referrals import commission_totals
+
+def pending_ids(app):
+    with app.app_context():
+        return [up.id for up in UserPackage.query.filter_by(status='pending').order_by(UserPackage.id)]
+
+def status_of(app, status):
+    with app.app_context():
+        return UserPackage.query.filter_by(status=status).order_by(UserPackage.id).first().id
+
+@pytest.mark.parametrize('payload', [
+    None, {}, {'user_package_ids': []}, {'user_package_ids': 5}, {'user_package_ids': list(range(1, 502))},
+    {'user_package_ids': [True]}, {'user_package_ids': [1.5]}, {'user_package_ids': ['3']}, {'user_package_ids': [None]},
+])
+@pytest.mark.parametrize('path', ['/api/admin/approve/batch', '/api/admin/reject/batch'])
+def test_malformed_batches_are_rejected(client, seed, path, payload):
+    seed(1)
+    assert client.post(path, json=payload).status_code == 400
+
+def test_batch_approval_reports_each_item(app, client, seed):
+    seed(2)
+    first, second = pending_ids(app)
+    rejected = status_of(app, 'rejected')
+    response = client.post('/api/admin/approve/batch', json={'user_package_ids': [first, 999999, rejected, first, second]})
+    assert response.status_code == 200
+    assert response.get_json()['results'] == [
+        {'user_package_id': first, 'status': 'paid'},
+        {'user_package_id': 999999, 'error': 'Package not found or being processed by another admin'},
+        {'user_package_id': rejected, 'error': "Package is not in a 'pending' state"},
+        {'user_package_id': second, 'status': 'paid'},
+    ]
+    with app.app_context():
+        for user_package_id in (first, second):
+            up = db.session.get(UserPackage, user_package_id)
+            assert up.status == 'paid' and not up.is_matured
+            assert up.first_activation_date == up.activation_date
+            assert up.expiry_date == calculate_expiry_date(up.activation_date, up.package.duration_days)
+        assert db.session.get(UserPackage, rejected).status == 'rejected'
+
+def test_batch_approval_credits_referrers_on_first_activation_only(app, client, seed):
+    seed(2)
+    with app.app_context():
+        referrer, referred = User.query.order_by(User.id).all()
+        referred.referred_by_id = referrer.id
+        # Treat the referred user's seeded packages as never approved.
+        UserPackage.query.filter_by(user_id=referred.id).update({'first_activation_date': None})
+        first = UserPackage.query.filter_by(user_id=referred.id, status='pending').one()
+        later = UserPackage(user_id=referred.id, package_id=first.package_id, investment_amount=90000,
+                            status='pending', purchase_date=first.purchase_date + timedelta(days=1))
+        another = UserPackage(user_id=referred.id, package_id=first.package_id, investment_amount=50000,
+                              status='pending', purchase_date=first.purchase_date + timedelta(days=2))
+        db.session.add_all([later, another])
+        db.session.commit()
+        referrer_id, ids = referrer.id, (first.id, later.id, another.id)
+
+    # Two first activations in one batch: the earlier purchase earns the commission, once.
+    client.post('/api/admin/approve/batch', json={'user_package_ids': [ids[1], ids[0]]})
+    with app.app_context():
+        assert db.session.get(User, referrer_id).commission_earned == 20000 * 0.02
+    # Later approvals earn nothing more.
+    client.post('/api/admin/approve/batch', json={'user_package_ids': [ids[2]]})
+    with app.app_context():
+        assert db.session.get(User, referrer_id).commission_earned == 20000 * 0.02
+        assert commission_totals([referrer_id]) == {referrer_id: 20000 * 0.02}
+
+def test_batch_rejection_reports_each_item_and_records_the_reason(app, client, seed):
+    seed(1)
+    (pending,) = pending_ids(app)
+    paid = status_of(app, 'expired')
+    response = client.post('/api/admin/reject/batch', json={'user_package_ids': [pending, paid, 424242], 'reason': 'Blurry'})
+    assert response.get_json()['results'] == [
+        {'user_package_id': pending, 'status': 'rejected'},
+        {'user_package_id': paid, 'error': "Package is not in a 'pending' state"},
+        {'user_package_id': 424242, 'error': 'Package not found or being processed by another admin'},
+    ]
+    with app.app_context():
+        up = db.session.get(UserPackage, pending)
+        assert (up.status, up.rejection_reason) == ('rejected', 'Blurry')
+        assert db.session.get(UserPackage, paid).status == 'expired'
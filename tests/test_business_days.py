@@ -0,0 +1,55 @@
+import random
+from datetime import date, datetime, timedelta
+import pytest
+from app.business_days import BusinessCalendar, fixed_holidays, get_calendar
+
+def step_one_day_at_a_time(start, working_days, holidays=()):
+    """The day-by-day loop the calendar replaced, with holidays skipped as well."""
+    current_date = start
+    days_added = 0
+    while days_added < working_days:
+        current_date += timedelta(days=1)
+        if current_date.weekday() < 5 and current_date.date() not in holidays:
+            days_added += 1
+    return current_date
+
+# 2025-01-06 is a Monday, so the starts cover every weekday including the weekend.
+WEEK = [datetime(2025, 1, 6, 9, 30) + timedelta(days=i) for i in range(7)]
+
+@pytest.mark.parametrize('start', WEEK, ids=lambda d: d.strftime('%a'))
+def test_matches_the_loop_without_holidays(start):
+    calendar = BusinessCalendar()
+    for days in range(0, 60):
+        assert calendar.add_business_days(start, days) == step_one_day_at_a_time(start, days)
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_the_loop_with_random_holidays(seed):
+    rng = random.Random(seed)
+    first = date(2025, 1, 1)
+    holidays = {first + timedelta(days=rng.randrange(400)) for _ in range(rng.randrange(0, 40))}
+    # Runs of consecutive holidays, so a crossed holiday can push the end onto another.
+    for _ in range(rng.randrange(0, 4)):
+        run_start = first + timedelta(days=rng.randrange(400))
+        holidays.update(run_start + timedelta(days=i) for i in range(rng.randrange(2, 10)))
+    calendar = BusinessCalendar(holidays)
+    for _ in range(200):
+        start = datetime(2025, 1, 1, 14) + timedelta(days=rng.randrange(300))
+        days = rng.randrange(0, 80)
+        assert calendar.add_business_days(start, days) == step_one_day_at_a_time(start, days, holidays), (start, days)
+
+def test_batch_form_matches_single_calls():
+    calendar = BusinessCalendar([date(2025, 1, 8)])
+    counts = list(range(len(WEEK)))
+    assert calendar.add_business_days_many(WEEK, counts) == [calendar.add_business_days(s, n) for s, n in zip(WEEK, counts)]
+    assert calendar.add_business_days_many(WEEK, 18) == [calendar.add_business_days(s, 18) for s in WEEK]
+
+def test_fixed_holidays_are_loaded_for_configured_years(make_app):
+    app = make_app(BUSINESS_HOLIDAYS=['2025-04-18'], BUSINESS_HOLIDAY_YEARS=[2025])
+    with app.app_context():
+        calendar = get_calendar()
+    holidays = set(fixed_holidays([2025])) | {date(2025, 4, 18)}
+    # Thursday 2025-09-25 + 5 working days crosses Independence Day (Wed 1 Oct).
+    start = datetime(2025, 9, 25, 12)
+    assert calendar.add_business_days(start, 5) == step_one_day_at_a_time(start, 5, holidays) == datetime(2025, 10, 3, 12)
+    start = datetime(2025, 4, 16, 12)
+    assert calendar.add_business_days(start, 2) == datetime(2025, 4, 21, 12)
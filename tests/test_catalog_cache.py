@@ -0,0 +1,29 @@
+import hashlib
+import threading
+from app.cache import package_catalog
+
+def test_catalog_stays_consistent_while_being_invalidated(app, client, seed):
+    seed(1)
+    stop = threading.Event()
+
+    def invalidate_repeatedly():
+        while not stop.is_set():
+            package_catalog.invalidate()
+
+    invalidator = threading.Thread(target=invalidate_repeatedly)
+    invalidator.start()
+    try:
+        for _ in range(200):
+            response = client.get('/api/packages')
+            assert response.status_code == 200
+            assert response.headers['ETag'].strip('"') == hashlib.sha1(response.data).hexdigest()
+            assert response.get_json()[0]['name'] == 'Conservative'
+    finally:
+        stop.set()
+        invalidator.join()
+
+def test_held_snapshot_survives_invalidation(app):
+    with app.app_context():
+        snapshot = package_catalog.get_snapshot()
+        package_catalog.invalidate()
+        assert snapshot.payload == b'[]' and snapshot.etag == hashlib.sha1(b'[]').hexdigest()
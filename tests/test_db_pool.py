@@ -0,0 +1,22 @@
+from sqlalchemy import event
+from sqlalchemy.pool import Pool, QueuePool
+from app.auth import issue_token
+from app.db_pool import measure_pool_throughput
+
+def test_pool_benchmark_opens_no_more_than_the_pool_size(tmp_path):
+    opened = []
+    record = lambda dbapi_connection, record: opened.append(dbapi_connection)
+    event.listen(Pool, 'connect', record)
+    try:
+        result = measure_pool_throughput(f"sqlite:///{tmp_path / 'pool.db'}", {'poolclass': QueuePool, 'max_overflow': 20},
+                                         pool_size=2, threads=8, duration=0.3)
+    finally:
+        event.remove(Pool, 'connect', record)
+    assert result['max_overflow'] == 0 and result['queries_per_second'] > 0
+    assert 0 < len(opened) <= 2
+
+def test_pool_stats_need_an_admin_token(app, client):
+    assert client.get('/api/admin/db/pool').status_code == 401
+    with app.app_context():
+        headers = {'Authorization': f'Bearer {issue_token(1, True)}'}
+    assert 'default' in client.get('/api/admin/db/pool', headers=headers).get_json()
@@ -0,0 +1,35 @@
+from datetime import datetime
+from sqlalchemy import update
+from app.extensions import db
+from app.models import UserPackage
+
+def dashboard(client, user_id, etag=None):
+    return client.get(f'/api/user/{user_id}/dashboard', headers={'If-None-Match': etag} if etag else {})
+
+def test_dashboard_etag_changes_with_every_write(app, client, seed):
+    seed(1)
+    with app.app_context():
+        user_package = UserPackage.query.filter_by(status='pending').one()
+        user_id, user_package_id = user_package.user_id, user_package.id
+
+    etag = dashboard(client, user_id).headers['ETag']
+    assert dashboard(client, user_id, etag).status_code == 304
+
+    # A write from an app server whose clock runs behind leaves max(updated_at) where it was.
+    with app.app_context():
+        user_package = db.session.get(UserPackage, user_package_id)
+        user_package.depositor_name = 'Ada'
+        user_package.updated_at = datetime(2000, 1, 1)
+        db.session.commit()
+    response = dashboard(client, user_id, etag)
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    etag = response.headers['ETag']
+
+    # Set-based Core updates bump the version too.
+    with app.app_context():
+        db.session.execute(update(UserPackage).where(UserPackage.id == user_package_id).values(is_matured=True))
+        db.session.commit()
+    response = dashboard(client, user_id, etag)
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+    assert dashboard(client, user_id, response.headers['ETag']).status_code == 304
@@ -0,0 +1,137 @@
+import socket
+import threading
+import time
+import pytest
+from aiosmtpd.controller import Controller
+from flask_mail import Message
+from app import mailer
+from app.mailer import MailQueue, mail_dispatcher
+
+class RecordingHandler:
+    """Records delivered subjects and the SMTP sessions they arrived on; can refuse subjects once."""
+
+    def __init__(self):
+        self.subjects = []
+        self.sessions = []
+        self.fail_once = set()
+        self.lock = threading.Lock()
+
+    async def handle_DATA(self, server, session, envelope):
+        subject = next(line for line in envelope.content.decode().splitlines() if line.startswith('Subject: '))[9:]
+        with self.lock:
+            if subject in self.fail_once:
+                self.fail_once.discard(subject)
+                return '451 Try again later'
+            self.subjects.append(subject)
+            if session not in self.sessions:
+                self.sessions.append(session)
+        return '250 OK'
+
+@pytest.fixture
+def smtp_server():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    handler.port = port
+    yield handler
+    controller.stop()
+
+@pytest.fixture
+def make_dispatcher(make_app, smtp_server):
+    dispatchers = []
+
+    def make(**config):
+        app = make_app(MAIL_SERVER='127.0.0.1', MAIL_PORT=smtp_server.port, MAIL_USE_TLS=False, MAIL_USE_SSL=False,
+                       MAIL_SUPPRESS_SEND=False, MAIL_DEFAULT_SENDER='noreply@example.com', MAIL_RETRY_BACKOFF=0)
+        app.config.update(**config)
+        dispatcher = MailQueue(app, workers=1)
+        dispatchers.append(dispatcher)
+        return dispatcher
+
+    yield make
+    for dispatcher in dispatchers:
+        dispatcher.shutdown()
+
+def send_all(dispatcher, subjects):
+    with dispatcher.app.app_context():
+        for subject in subjects:
+            assert dispatcher.send(Message(subject, recipients=['user@example.com'], body='hello'))
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def test_queued_mail_shares_one_connection(make_dispatcher, smtp_server):
+    dispatcher = make_dispatcher(MAIL_BATCH_SIZE=5, MAIL_IDLE_TIMEOUT=5)
+    subjects = [f'message {i}' for i in range(12)]
+    send_all(dispatcher, subjects)
+    wait_for(lambda: len(smtp_server.subjects) == len(subjects))
+    assert sorted(smtp_server.subjects) == sorted(subjects)
+    assert len(smtp_server.sessions) == 1
+
+def test_failed_message_is_retried_and_the_rest_requeued(make_dispatcher, smtp_server):
+    smtp_server.fail_once.add('message 3')
+    dispatcher = make_dispatcher(MAIL_BATCH_SIZE=10)
+    subjects = [f'message {i}' for i in range(8)]
+    send_all(dispatcher, subjects)
+    wait_for(lambda: len(smtp_server.subjects) == len(subjects))
+    # Every message arrives exactly once, the refused one on a second connection.
+    assert sorted(smtp_server.subjects) == sorted(subjects)
+    assert len(smtp_server.sessions) == 2
+
+def test_shutdown_flushes_the_queue_without_waiting_out_the_idle_timeout(make_dispatcher, smtp_server):
+    dispatcher = make_dispatcher(MAIL_IDLE_TIMEOUT=30)
+    subjects = [f'message {i}' for i in range(30)]
+    send_all(dispatcher, subjects)
+    started = time.monotonic()
+    dispatcher.shutdown()
+    assert time.monotonic() - started < 10
+    assert sorted(smtp_server.subjects) == sorted(subjects)
+
+def test_worker_survives_a_failure_closing_the_connection(make_dispatcher, smtp_server, monkeypatch):
+    dispatcher = make_dispatcher(MAIL_IDLE_TIMEOUT=0)
+    real_connect = mailer.mail.connect
+    closes = []
+
+    class FailingClose:
+        def __enter__(self):
+            self.connection = real_connect().__enter__()
+            return self.connection
+
+        def __exit__(self, *exc_info):
+            self.connection.__exit__(*exc_info)
+            if not closes:
+                closes.append(True)
+                raise OSError("connection reset on QUIT")
+
+    monkeypatch.setattr(mailer.mail, 'connect', FailingClose)
+    send_all(dispatcher, ['before'])
+    wait_for(lambda: closes)
+    send_all(dispatcher, ['after'])
+    wait_for(lambda: len(smtp_server.subjects) == 2)
+    assert smtp_server.subjects == ['before', 'after']
+    assert all(worker.is_alive() for worker in dispatcher._workers)
+
+def mail_threads():
+    return [t for t in threading.enumerate() if t.name.startswith('mail-dispatch-')]
+
+def test_workers_start_with_the_first_message_and_belong_to_their_app(make_app, smtp_server):
+    config = dict(MAIL_SERVER='127.0.0.1', MAIL_PORT=smtp_server.port, MAIL_USE_TLS=False, MAIL_USE_SSL=False,
+                  MAIL_SUPPRESS_SEND=False, MAIL_DEFAULT_SENDER='noreply@example.com', MAIL_WORKERS=2)
+    before = len(mail_threads())
+    first, second = make_app(**config), make_app(**config)
+    assert len(mail_threads()) == before
+    assert first.extensions['mail_dispatcher'] is not second.extensions['mail_dispatcher']
+
+    with first.app_context():
+        assert mail_dispatcher.send(Message('hello', recipients=['user@example.com'], body='hello'))
+        first_queue = first.extensions['mail_dispatcher']
+        assert len(first_queue._workers) == 2
+        mail_dispatcher.shutdown()
+    assert smtp_server.subjects == ['hello']
+    assert second.extensions['mail_dispatcher']._workers == []
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.maturity import sweep_matured_packages
+from app.models import UserPackage, WithdrawalRequest
+
+NOW = datetime(2025, 6, 2, 12, 0)
+
+def add_packages(app, seed, expiries):
+    """Gives the first seeded user a paid package per expiry date; returns their ids."""
+    seed(1)
+    with app.app_context():
+        template = UserPackage.query.first()
+        packages = [UserPackage(user_id=template.user_id, package_id=template.package_id, investment_amount=20000,
+                                status=status, activation_date=NOW - timedelta(days=30), expiry_date=expiry)
+                    for status, expiry in expiries]
+        db.session.add_all(packages)
+        db.session.commit()
+        return [p.id for p in packages]
+
+def matured(app, ids):
+    with app.app_context():
+        return [db.session.get(UserPackage, i).is_matured for i in ids]
+
+def test_sweep_flags_due_paid_packages_in_batches(app, seed, count_statements):
+    ids = add_packages(app, seed, [('paid', NOW - timedelta(days=d)) for d in range(1, 6)] + [
+        ('paid', NOW),                                  # due exactly now
+        ('paid', NOW + timedelta(microseconds=1)),      # not yet due
+        ('withdrawn', NOW - timedelta(days=1)),         # not paid
+    ])
+    with app.app_context(), count_statements() as statements:
+        assert sweep_matured_packages(batch_size=2, now=NOW) == 6
+    assert sum(s.lstrip().startswith('UPDATE') for s in statements) == 3
+    assert matured(app, ids) == [True] * 6 + [False, False]
+
+    with app.app_context():
+        assert sweep_matured_packages(batch_size=2, now=NOW) == 0
+
+def test_renewal_clears_the_matured_flag(app, client, seed):
+    (user_package_id,) = add_packages(app, seed, [('paid', NOW - timedelta(days=1))])
+    with app.app_context():
+        sweep_matured_packages(now=NOW)
+        up = db.session.get(UserPackage, user_package_id)
+        up.status = 'expired'
+        withdrawal = WithdrawalRequest(user_id=up.user_id, user_package_id=up.id, amount=2000,
+                                       withdrawal_method='crypto', wallet_address='T1', crypto_network='TRC20')
+        db.session.add(withdrawal)
+        db.session.commit()
+        withdrawal_id = withdrawal.id
+    assert matured(app, [user_package_id]) == [True]
+
+    assert client.post(f'/api/admin/withdrawals/{withdrawal_id}/approve').status_code == 200
+    assert matured(app, [user_package_id]) == [False]
+    with app.app_context():
+        # The renewed cycle's expiry is in the future, so the next sweep leaves it alone.
+        assert sweep_matured_packages() == 0
@@ -0,0 +1,20 @@
+import pytest
+from app.auth import issue_token
+
+@pytest.fixture
+def app(make_app):
+    return make_app(METRICS_ENABLED=True)
+
+def bearer(app, is_admin):
+    with app.app_context():
+        return {'Authorization': f'Bearer {issue_token(1, is_admin)}'}
+
+def test_metrics_need_an_admin_token_even_with_auth_optional(app, client):
+    assert client.get('/api/metrics').status_code == 401
+    assert client.get('/api/metrics', headers=bearer(app, False)).status_code == 403
+
+def test_metrics_report_endpoint_counters_to_an_admin(app, client):
+    client.get('/api/packages')
+    response = client.get('/api/metrics', headers=bearer(app, True))
+    assert response.status_code == 200
+    assert 'get_packages' in response.get_data(as_text=True)
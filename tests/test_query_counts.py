@@ -0,0 +1,18 @@
+import pytest
+
+ADMIN_QUEUES = ['/api/admin/pending', '/api/admin/history', '/api/admin/withdrawals']
+
+@pytest.mark.parametrize('path', ADMIN_QUEUES)
+def test_admin_queue_statement_count_does_not_grow_with_rows(client, seed, count_statements, path):
+    seed(1)
+    with count_statements() as one_row:
+        response = client.get(path)
+    assert response.status_code == 200
+
+    seed(40)
+    with count_statements() as many_rows:
+        response = client.get(path)
+    assert response.status_code == 200
+    assert len(response.get_json()['items']) > 40
+
+    assert len(many_rows) == len(one_row), many_rows
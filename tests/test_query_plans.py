@@ -0,0 +1,52 @@
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.extensions import db
+
+LIST_ROUTES = [
+    '/api/user/1/dashboard',
+    '/api/user/1/history',
+    '/api/admin/pending',
+    '/api/admin/history',
+    '/api/admin/withdrawals',
+]
+
+@contextmanager
+def capture_page_queries():
+    """Collects (statement, parameters) for the paginated SELECTs a request runs."""
+    captured = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith('SELECT') and 'ORDER BY' in statement and 'LIMIT' in statement:
+            captured.append((statement, parameters))
+    event.listen(Engine, 'before_cursor_execute', record)
+    try:
+        yield captured
+    finally:
+        event.remove(Engine, 'before_cursor_execute', record)
+
+def query_plan(app, statement, parameters):
+    with app.app_context():
+        connection = db.session.connection().connection.driver_connection
+        return [row[3] for row in connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+
+@pytest.mark.parametrize('path', LIST_ROUTES)
+def test_list_pages_are_read_off_an_index_without_sorting(app, client, seed, path):
+    seed(60)
+    first_page = client.get(f'{path}?limit=2').get_json()
+    assert first_page['next_cursor']
+
+    with capture_page_queries() as queries:
+        client.get(f"{path}?limit=2")
+        client.get(f"{path}?limit=2&cursor={first_page['next_cursor']}")
+    assert len(queries) == 2
+
+    for statement, parameters in queries:
+        plan = query_plan(app, statement, parameters)
+        assert not any('TEMP B-TREE' in step for step in plan), plan
+        # The listed table is reached through an index, never a full table scan.
+        assert not any(step.startswith('SCAN') and 'USING' not in step for step in plan), plan
+
+    # Later pages seek to the cursor instead of walking the index from the top.
+    cursor_plan = query_plan(app, *queries[1])
+    assert cursor_plan[0].startswith('SEARCH'), cursor_plan
@@ -0,0 +1,44 @@
+from app.benchmark import compare_referral_commission
+from app.models import User, UserPackage
+
+def test_windowed_commission_matches_the_per_referral_loop(app, seed):
+    seed(1)
+    with app.app_context():
+        before = (User.query.count(), UserPackage.query.count())
+        result = compare_referral_commission(25, repeat=1)
+        assert result['loop']['commission'] > 0
+        assert result['windowed']['commission'] == result['loop']['commission']
+        # The benchmark cleans up after itself.
+        assert (User.query.count(), UserPackage.query.count()) == before
+
+def test_ledger_matches_history_when_packages_are_approved_out_of_purchase_order(app, client):
+    from datetime import datetime
+    from app.extensions import db
+    from app.models import Package
+    from app.referrals import commission_totals
+
+    with app.app_context():
+        package = Package(name='Growth', min_price=15000, max_price=5000000, min_price_usd=10,
+                          max_price_usd=3400, duration_days=18, dividend_percentage=10)
+        referrer = User(telegram_id=1, first_name='Referrer', referral_code='referrer01')
+        db.session.add_all([package, referrer])
+        db.session.flush()
+        referred = User(telegram_id=2, first_name='Referred', referral_code='referred01', referred_by_id=referrer.id)
+        db.session.add(referred)
+        db.session.flush()
+        bought_first = UserPackage(user_id=referred.id, package_id=package.id, investment_amount=100000,
+                                   status='pending', purchase_date=datetime(2025, 1, 1))
+        bought_second = UserPackage(user_id=referred.id, package_id=package.id, investment_amount=20000,
+                                    status='pending', purchase_date=datetime(2025, 1, 2))
+        db.session.add_all([bought_first, bought_second])
+        db.session.commit()
+        referrer_id, first_id, second_id = referrer.id, bought_first.id, bought_second.id
+
+    # The later purchase is approved first, so it is the one that earns the commission.
+    assert client.post(f'/api/admin/approve/{second_id}').status_code == 200
+    response = client.post('/api/admin/approve/batch', json={'user_package_ids': [first_id]})
+    assert response.get_json()['results'] == [{'user_package_id': first_id, 'status': 'paid'}]
+
+    with app.app_context():
+        assert db.session.get(User, referrer_id).commission_earned == 20000 * 0.02
+        assert commission_totals([referrer_id]) == {referrer_id: 20000 * 0.02}
@@ -0,0 +1,61 @@
+import io
+import time
+import pytest
+from app.auth import issue_token
+from app.extensions import db
+from app.models import UserPackage
+from app.replicas import replica_router, RECENT_WRITES_HEADER
+
+@pytest.fixture
+def app(make_app, tmp_path):
+    # An empty replica, so a read that reaches it finds no packages.
+    app = make_app(SQLALCHEMY_BINDS={'replica_0': f"sqlite:///{tmp_path / 'replica.db'}"}, READ_YOUR_WRITES_WINDOW=10)
+    with app.app_context():
+        db.metadata.create_all(db.engines['replica_0'])
+    return app
+
+def submit_bank_details(app, client, seed):
+    seed(1)
+    with app.app_context():
+        user_package = UserPackage.query.filter_by(status='pending').first()
+        user_id, user_package_id = user_package.user_id, user_package.id
+    response = client.post(f'/api/user/package/{user_package_id}/submit_bank_details',
+                           json={'depositor_name': 'Ada', 'depositor_bank': 'Bank', 'deposited_amount': 20000})
+    assert response.status_code == 200
+    # Another worker has no record of the write.
+    replica_router._recent_writes.clear()
+    return user_id, response.headers[RECENT_WRITES_HEADER]
+
+def history_items(client, user_id, headers=None):
+    return client.get(f'/api/user/{user_id}/history', headers=headers or {}).get_json()['items']
+
+def test_client_echoing_the_header_reads_its_writes_on_any_worker(app, client, seed):
+    user_id, recent_writes = submit_bank_details(app, client, seed)
+    assert history_items(client, user_id, {RECENT_WRITES_HEADER: recent_writes})
+    assert history_items(client, user_id) == []
+
+def test_header_only_covers_the_scopes_written(app, client, seed):
+    user_id, recent_writes = submit_bank_details(app, client, seed)
+    with app.test_request_context(headers={RECENT_WRITES_HEADER: recent_writes}):
+        assert replica_router.recently_written(f'user:{user_id}')
+        assert not replica_router.recently_written(f'user:{user_id + 1}')
+
+def test_forged_or_expired_header_is_ignored(app, client, seed, monkeypatch):
+    user_id, recent_writes = submit_bank_details(app, client, seed)
+    assert history_items(client, user_id, {RECENT_WRITES_HEADER: recent_writes[:-2] + 'xx'}) == []
+
+    real_time = time.time
+    monkeypatch.setattr(time, 'time', lambda: real_time() + 60)
+    with app.test_request_context(headers={RECENT_WRITES_HEADER: recent_writes}):
+        assert not replica_router.recently_written(f'user:{user_id}')
+
+def test_catalog_reloads_from_the_primary_after_a_package_is_created(app, client):
+    with app.app_context():
+        headers = {'Authorization': f'Bearer {issue_token(1, True)}'}
+    assert client.get('/api/packages').get_json() == []
+
+    form = {'name': 'Growth', 'min_price': '50000', 'min_price_usd': '35', 'duration_days': '20',
+            'dividend_percentage': '12', 'image': (io.BytesIO(b'not an image'), 'package.png')}
+    response = client.post('/api/admin/packages', headers=headers, data=form)
+    assert response.status_code == 201
+    assert [p['name'] for p in client.get('/api/packages').get_json()] == ['Growth']
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.models import Package, User, UserPackage
+
+def test_summary_aggregates_by_status(app, client, seed):
+    seed(1)  # another user's packages, which must not be counted
+    now = datetime.utcnow()
+    soonest = now + timedelta(days=3)
+    with app.app_context():
+        package_id = Package.query.one().id  # 10% dividend
+        user = User(telegram_id=42, first_name='Investor', referral_code='investor01')
+        db.session.add(user)
+        db.session.flush()
+        for status, amount, withdrawn, expiry in [
+            ('paid', 100000, 1000, soonest),
+            ('paid', 60000, 0, now - timedelta(days=1)),   # past expiry: active but not the next maturity
+            ('paid', 70000, 0, now + timedelta(days=10)),
+            ('expired', 30000, 3000, now - timedelta(days=5)),
+            ('withdrawn', 40000, 40000, now - timedelta(days=9)),
+            ('rejected', 50000, 0, None),
+            ('pending', 10000, 0, None),
+            ('proof_processing', 5000, 0, None),
+        ]:
+            db.session.add(UserPackage(user_id=user.id, package_id=package_id, investment_amount=amount, status=status,
+                                       total_withdrawn=withdrawn, expiry_date=expiry))
+        db.session.commit()
+        user_id = user.id
+
+    assert client.get(f'/api/user/{user_id}/summary').get_json() == {
+        'invested': 300000,
+        'withdrawn': 44000,
+        'projected_dividend': 23000,
+        'next_maturity': soonest.isoformat(),
+        'active_packages': 3,
+        'pending_packages': 2,
+    }
+
+def test_summary_for_a_user_without_packages(app, client):
+    with app.app_context():
+        user = User(telegram_id=43, first_name='New', referral_code='newuser001')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+    assert client.get(f'/api/user/{user_id}/summary').get_json() == {
+        'invested': 0, 'withdrawn': 0, 'projected_dividend': 0, 'next_maturity': None,
+        'active_packages': 0, 'pending_packages': 0,
+    }
@@ -0,0 +1,78 @@
+import io
+import os
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.models import UserPackage
+from app.uploads import proof_uploads
+
+class Upload:
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+
+def stuck_package(user_id, package_id, minutes_ago, proof_hash=None):
+    user_package = UserPackage(user_id=user_id, package_id=package_id, investment_amount=20000, status='proof_processing',
+                               payment_method='crypto', payment_proof_hash=proof_hash)
+    db.session.add(user_package)
+    db.session.flush()
+    user_package.updated_at = datetime.utcnow() - timedelta(minutes=minutes_ago)
+    return user_package
+
+def test_recover_requeues_spooled_proofs_and_resets_the_rest(app, seed):
+    seed(1)
+    with app.app_context():
+        first = UserPackage.query.first()
+        spooled = stuck_package(first.user_id, first.package_id, minutes_ago=30)
+        path, proof_hash = proof_uploads.spool(Upload(b'proof bytes'), spooled.id)
+        spooled.payment_proof_hash = proof_hash
+        lost = stuck_package(first.user_id, first.package_id, minutes_ago=30, proof_hash='0' * 64)
+        in_flight = stuck_package(first.user_id, first.package_id, minutes_ago=1, proof_hash='1' * 64)
+        db.session.commit()
+        ids = spooled.id, lost.id, in_flight.id
+
+        assert proof_uploads.recover(timedelta(minutes=10)) == (1, 1)
+
+        db.session.expire_all()
+        spooled, lost, in_flight = (db.session.get(UserPackage, i) for i in ids)
+        assert spooled.status == 'pending' and spooled.payment_proof_url.endswith(os.path.basename(path))
+        assert not os.path.exists(path)
+        assert lost.status == 'pending' and lost.payment_proof_url is None
+        assert in_flight.status == 'proof_processing'
+
+def test_uploaded_proof_is_stored_and_the_spool_emptied(app, client, seed):
+    seed(1)
+    with app.app_context():
+        user_package_id = UserPackage.query.filter_by(status='rejected').first().id
+        db.session.get(UserPackage, user_package_id).status = 'pending'
+        db.session.commit()
+    response = client.post(f'/api/user/package/{user_package_id}/upload_proof',
+                           data={'proof': (io.BytesIO(b'new proof'), 'proof.png')})
+    assert response.status_code == 200, response.get_json()
+    with app.app_context():
+        user_package = db.session.get(UserPackage, user_package_id)
+        assert user_package.status == 'pending'
+        assert user_package.payment_proof_url.split('/')[-1].startswith(f'{user_package_id}.{user_package.payment_proof_hash}.')
+    assert os.listdir(app.config['UPLOAD_SPOOL_DIR']) == []
+
+def test_same_proof_for_two_packages_is_stored_once_and_flagged(app, client, seed, monkeypatch):
+    seed(2)
+    with app.app_context():
+        first, second = [up.id for up in UserPackage.query.filter_by(status='pending').order_by(UserPackage.id)]
+    uploads = []
+    real_upload = proof_uploads.storage.upload
+    monkeypatch.setattr(proof_uploads.storage, 'upload', lambda path, folder: uploads.append(path) or real_upload(path, folder))
+
+    for user_package_id in (first, second):
+        response = client.post(f'/api/user/package/{user_package_id}/upload_proof',
+                               data={'proof': (io.BytesIO(b'the same receipt'), 'receipt.png')})
+        assert response.status_code == 200
+    assert len(uploads) == 1
+
+    with app.app_context():
+        first_package, second_package = db.session.get(UserPackage, first), db.session.get(UserPackage, second)
+        assert second_package.status == 'pending'
+        assert second_package.payment_proof_url == first_package.payment_proof_url
+        assert second_package.payment_proof_hash == first_package.payment_proof_hash
+
+    pending = {item['user_package_id']: item for item in client.get('/api/admin/pending').get_json()['items']}
+    assert pending[first]['duplicate_proof_package_ids'] == [second]
+    assert pending[second]['duplicate_proof_package_ids'] == [first]
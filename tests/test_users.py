@@ -0,0 +1,43 @@
+from app.extensions import db
+from app.models import User
+from app.users import upsert_user
+
+def test_existing_user_is_found_without_an_insert(app, count_statements):
+    with app.app_context():
+        created, is_new = upsert_user(555, 'Ada')
+        assert is_new
+
+        with count_statements() as statements:
+            user, is_new = upsert_user(555, 'Ada')
+        assert not is_new and user.id == created.id
+        assert len(statements) == 1 and statements[0].lstrip().startswith('SELECT'), statements
+
+def test_new_user_is_linked_to_their_referrer(app):
+    with app.app_context():
+        referrer, _ = upsert_user(1, 'Referrer')
+        user, is_new = upsert_user(2, 'Referred', referral_code=referrer.referral_code)
+        assert is_new
+        assert db.session.get(User, user.id).referred_by_id == referrer.id
+        assert User.query.count() == 2
+
+def test_user_created_by_a_concurrent_launch_after_the_lookup_is_returned(app, monkeypatch):
+    from app import users
+    real_find_user = users._find_user
+    winner = {}
+
+    def find_user_then_lose_the_race(telegram_id, locking=False):
+        user = real_find_user(telegram_id, locking)
+        if user is None and not winner:
+            # Another worker commits the same user between the lookup and the INSERT.
+            with db.engine.begin() as other:
+                other.execute(User.__table__.insert().values(telegram_id=telegram_id, first_name='Ada', is_admin=False,
+                                                             referral_code='winner0001'))
+            winner['id'] = db.session.execute(db.select(User.id).filter_by(telegram_id=telegram_id)).scalar()
+        return user
+
+    monkeypatch.setattr(users, '_find_user', find_user_then_lose_the_race)
+    with app.app_context():
+        user, is_new = upsert_user(777, 'Ada')
+        assert not is_new
+        assert user.id == winner['id'] and user.referral_code == 'winner0001'
+        assert User.query.filter_by(telegram_id=777).count() == 1
@@ -0,0 +1,79 @@
+import pytest
+from app.business_days import calculate_expiry_date
+from app.extensions import db
+from app.models import Package, UserPackage, WithdrawalRequest
+
+def prepare(app, seed):
+    """
+    Seeds four users with a pending withdrawal each and shapes them into a
+    mixed batch: one closes its package, one renews on the default duration,
+    one renews on a longer package, and one request is no longer pending.
+    Returns [(withdrawal id, user package id)] in that order.
+    """
+    seed(4)
+    with app.app_context():
+        longer = Package(name='Long', min_price=1, min_price_usd=1, duration_days=25, dividend_percentage=10)
+        db.session.add(longer)
+        db.session.flush()
+        closing, renewing, renewing_longer, not_pending = WithdrawalRequest.query.order_by(WithdrawalRequest.id).all()[-4:]
+        closing.user_package.total_withdrawn = 27000
+        renewing.user_package.total_withdrawn = 3000
+        renewing_longer.user_package.package_id = longer.id
+        not_pending.status = 'approved'
+        db.session.commit()
+        return [(w.id, w.user_package_id) for w in (closing, renewing, renewing_longer, not_pending)]
+
+def package_states(app, pairs):
+    """(status, total_withdrawn, is_matured, cycle length) per package, and the withdrawals still present."""
+    with app.app_context():
+        states = []
+        for _, user_package_id in pairs:
+            up = db.session.get(UserPackage, user_package_id)
+            states.append((up.status, up.total_withdrawn, up.is_matured, up.expiry_date - up.activation_date))
+        remaining = {w.id for w in WithdrawalRequest.query.filter(WithdrawalRequest.id.in_([w for w, _ in pairs]))}
+        return states, remaining
+
+def test_batch_withdrawal_approval_closes_renews_and_reports(app, client, seed):
+    pairs = prepare(app, seed)
+    closing, renewing, renewing_longer, not_pending = [w for w, _ in pairs]
+    response = client.post('/api/admin/withdrawals/approve/batch', json={'withdrawal_ids': [w for w, _ in pairs] + [31337]})
+    assert response.get_json()['results'] == [
+        {'withdrawal_id': closing, 'status': 'withdrawn'},
+        {'withdrawal_id': renewing, 'status': 'renewed'},
+        {'withdrawal_id': renewing_longer, 'status': 'renewed'},
+        {'withdrawal_id': not_pending, 'error': 'This withdrawal request is not pending.'},
+        {'withdrawal_id': 31337, 'error': 'Withdrawal not found or being processed by another admin'},
+    ]
+
+    states, remaining = package_states(app, pairs)
+    assert [state[:3] for state in states] == [
+        ('withdrawn', 30000, False),
+        ('paid', 6000, False),
+        ('paid', 3000, False),
+        ('expired', 0, False),
+    ]
+    assert remaining == {not_pending}
+    with app.app_context():
+        for _, user_package_id in pairs[1:3]:
+            up = db.session.get(UserPackage, user_package_id)
+            assert up.expiry_date == calculate_expiry_date(up.activation_date, up.package.duration_days)
+    # The two renewals are in different duration groups, so their cycles differ.
+    assert states[1][3] != states[2][3]
+
+def test_batch_matches_single_approvals(app, client, seed):
+    batch_pairs = prepare(app, seed)
+    single_pairs = prepare(app, seed)
+
+    client.post('/api/admin/withdrawals/approve/batch', json={'withdrawal_ids': [w for w, _ in batch_pairs]})
+    # The single endpoint doesn't check the request's status, so only send it the pending ones.
+    for withdrawal_id, _ in single_pairs[:3]:
+        assert client.post(f'/api/admin/withdrawals/{withdrawal_id}/approve').status_code == 200
+
+    batch_states, batch_remaining = package_states(app, batch_pairs)
+    single_states, single_remaining = package_states(app, single_pairs)
+    assert batch_states == single_states
+    assert len(batch_remaining) == len(single_remaining) == 1
+
+@pytest.mark.parametrize('payload', [None, {'withdrawal_ids': []}, {'withdrawal_ids': [True]}, {'withdrawal_ids': '1'}])
+def test_malformed_withdrawal_batches_are_rejected(client, payload):
+    assert client.post('/api/admin/withdrawals/approve/batch', json=payload).status_code == 400